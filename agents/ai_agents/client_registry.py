@@ -0,0 +1,96 @@
+import os
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional
+from agents.http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+# Her sağlayıcı istemcisi süreç başına bir kez oluşturulur ve thread'ler arasında paylaşılır.
+# Böylece her üretilen paragraf için istemci kurulumu ve TLS el sıkışması tekrarlanmaz.
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_timeout() -> float:
+    """Sağlayıcı çağrıları için istek zaman aşımı (saniye)."""
+    return float(os.getenv("AI_HTTP_TIMEOUT", "60"))
+
+
+def _create_provider_session():
+    # Sağlayıcı API'leri için ayrı havuz; web kazıma trafiğiyle bağlantı yarışmasın.
+    # Okuma/durum yeniden denemeleri kapalı: yanıt vermeyen sağlayıcı tek zaman aşımında
+    # başarısız olur ve provider_router'ın failover/hedging mantığı devreye girer.
+    return create_session(
+        pool_connections=int(os.getenv("AI_HTTP_POOL_CONNECTIONS", "4")),
+        pool_maxsize=int(os.getenv("AI_HTTP_POOL_MAXSIZE", "16")),
+        retry_reads=False,
+    )
+
+
+def _build_openai() -> Optional[Any]:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    import openai
+    # openai<1.0 modül düzeyinde yapılandırılır; bir kez ayarlanır ve tüm çağrılar aynı oturumu kullanır
+    openai.api_key = api_key
+    openai.requestssession = _create_provider_session()
+    return openai
+
+
+def _build_cohere() -> Optional[Any]:
+    api_key = os.getenv("COHERE_API_KEY")
+    if not api_key:
+        return None
+    import cohere
+    return cohere.Client(api_key, timeout=get_timeout())
+
+
+def _build_mistral() -> Optional[Any]:
+    hf_token = os.getenv("HF_API_TOKEN")
+    if not hf_token:
+        return None
+    session = _create_provider_session()
+    session.headers.update({"Authorization": f"Bearer {hf_token}"})
+    return session
+
+
+_BUILDERS: Dict[str, Callable[[], Optional[Any]]] = {
+    "openai": _build_openai,
+    "cohere": _build_cohere,
+    "mistral": _build_mistral,
+}
+
+
+def get_client(provider: str) -> Optional[Any]:
+    """
+    Sağlayıcının paylaşılan istemcisini döndürür, ilk çağrıda oluşturur.
+    API anahtarı tanımlı değilse None döner (ve kayıt yapılmaz, anahtar sonradan eklenebilir).
+    """
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(provider)
+        if client is None:
+            client = _BUILDERS[provider]()
+            if client is not None:
+                _clients[provider] = client
+                logger.info(f"Created shared {provider} client.")
+    return client
+
+
+def reset_clients():
+    """Kayıtlı istemcileri bırakır (anahtar değişikliği, kapanış veya testler için)."""
+    with _lock:
+        for provider, client in _clients.items():
+            if provider == "openai":
+                session = getattr(client, "requestssession", None)
+            elif provider == "mistral":
+                session = client
+            else:
+                session = None
+            if session is not None:
+                session.close()
+        _clients.clear()
@@ -1,19 +1,20 @@
-import os
-import cohere
 import logging
+from typing import Iterator
+from agents.ai_agents.client_registry import get_client
 
 logger = logging.getLogger(__name__)
 
+MODEL = "command-r"
+
 def ask_cohere(prompt: str, purpose: str = "default") -> str:
-    api_key = os.getenv("COHERE_API_KEY")
-    if not api_key:
+    co = get_client("cohere")
+    if co is None:
         logger.error("COHERE_API_KEY not set")
         return "Error: Cohere API key missing"
-    
-    co = cohere.Client(api_key)
+
     try:
         response = co.generate(
-            model='command-r', 
+            model=MODEL, 
             prompt=f"{purpose.upper()}:\n{prompt}",
             max_tokens=300,
             temperature=0.7
@@ -21,4 +22,32 @@ def ask_cohere(prompt: str, purpose: str = "default") -> str:
         return response.generations[0].text.strip()
     except Exception as e:
         logger.error(f"Cohere API error: {e}", exc_info=True)
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+def stream_cohere(prompt: str, purpose: str = "default") -> Iterator[str]:
+    """ask_cohere'nin akış sürümü: yanıt metnini geldikçe parça parça üretir."""
+    co = get_client("cohere")
+    if co is None:
+        logger.error("COHERE_API_KEY not set")
+        yield "Error: Cohere API key missing"
+        return
+
+    streamed = False
+    try:
+        response = co.generate(
+            model=MODEL,
+            prompt=f"{purpose.upper()}:\n{prompt}",
+            max_tokens=300,
+            temperature=0.7,
+            stream=True
+        )
+        for token in response:
+            text = getattr(token, "text", None)
+            if text:
+                streamed = True
+                yield text
+    except Exception as e:
+        logger.error(f"Cohere API error: {e}", exc_info=True)
+        if streamed:
+            raise # Yarıda kesilen akış router'da hata olarak işlenir
+        yield f"Error: {str(e)}"
@@ -1,28 +1,30 @@
-import os
+import json
 import requests
 import logging
+from typing import Iterator, List
+from agents.ai_agents.client_registry import get_client, get_timeout
 
 logger = logging.getLogger(__name__)
 
+MODEL = "mistralai/Mistral-7B-Instruct-v0.1"
+API_URL = f"https://api-inference.huggingface.co/models/{MODEL}"
+
 def ask_mistral(prompt: str, purpose: str = "default") -> str:
-    hf_token = os.getenv("HF_API_TOKEN")
-    if not hf_token:
+    session = get_client("mistral")
+    if session is None:
         logger.error("HF_API_TOKEN not set")
         return "Error: Hugging Face API token missing"
-    
-    headers = {
-        "Authorization": f"Bearer {hf_token}"
-    }
+
     payload = {
         "inputs": f"{purpose.upper()}:\n{prompt}",
         "parameters": {"temperature": 0.7}
     }
     
     try:
-        response = requests.post(
-            "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.1",
-            headers=headers,
-            json=payload
+        response = session.post(
+            API_URL,
+            json=payload,
+            timeout=get_timeout()
         )
         response.raise_for_status()  # Raises an exception for bad HTTP status codes
         return response.json()[0]['generated_text']
@@ -31,4 +33,78 @@ def ask_mistral(prompt: str, purpose: str = "default") -> str:
         return f"Error: {str(e)}"
     except (KeyError, IndexError) as e:
         logger.error(f"Error parsing Mistral API response: {e}", exc_info=True)
-        return "Error: Invalid response from Mistral API"
\ No newline at end of file
+        return "Error: Invalid response from Mistral API"
+
+def ask_mistral_batch(prompts: List[str], purpose: str = "default") -> List[str]:
+    """
+    Birden fazla prompt'u tek bir Inference API isteğiyle gönderir ("inputs" listesi).
+    Sonuçlar prompt sırasıyla döner; istek başarısız olursa her öğe için "Error: ..." döner.
+    """
+    session = get_client("mistral")
+    if session is None:
+        logger.error("HF_API_TOKEN not set")
+        return ["Error: Hugging Face API token missing"] * len(prompts)
+
+    payload = {
+        "inputs": [f"{purpose.upper()}:\n{prompt}" for prompt in prompts],
+        "parameters": {"temperature": 0.7}
+    }
+
+    try:
+        response = session.post(API_URL, json=payload, timeout=get_timeout())
+        response.raise_for_status()
+        results = []
+        for item in response.json():
+            # Liste girdide her öğe ya [{"generated_text": ...}] ya da {"generated_text": ...} olabilir
+            if isinstance(item, list):
+                item = item[0]
+            results.append(item['generated_text'])
+        if len(results) != len(prompts):
+            raise IndexError(f"expected {len(prompts)} generations, got {len(results)}")
+        return results
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Mistral API error: {e}", exc_info=True)
+        return [f"Error: {str(e)}"] * len(prompts)
+    except (KeyError, IndexError, TypeError) as e:
+        logger.error(f"Error parsing Mistral API batch response: {e}", exc_info=True)
+        return ["Error: Invalid response from Mistral API"] * len(prompts)
+
+def stream_mistral(prompt: str, purpose: str = "default") -> Iterator[str]:
+    """
+    ask_mistral'in akış sürümü. Inference API "stream": true ile server-sent events
+    döndürür; her "data:" satırındaki token metni geldikçe üretilir.
+    """
+    session = get_client("mistral")
+    if session is None:
+        logger.error("HF_API_TOKEN not set")
+        yield "Error: Hugging Face API token missing"
+        return
+
+    payload = {
+        "inputs": f"{purpose.upper()}:\n{prompt}",
+        "parameters": {"temperature": 0.7},
+        "stream": True
+    }
+
+    streamed = False
+    try:
+        with session.post(API_URL, json=payload, timeout=get_timeout(), stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                token = event.get("token", {})
+                if token.get("text") and not token.get("special"):
+                    streamed = True
+                    yield token["text"]
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Mistral API error: {e}", exc_info=True)
+        if streamed:
+            raise # Token'lar gönderildikten sonra hata: router yanıtı başarısız sayar, önbelleğe almaz
+        yield f"Error: {str(e)}"
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Error parsing Mistral API stream: {e}", exc_info=True)
+        if streamed:
+            raise
+        yield "Error: Invalid response from Mistral API"
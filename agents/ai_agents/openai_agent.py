@@ -1,26 +1,59 @@
-import os
-import openai
 import logging
+from typing import Iterator
+from agents.ai_agents.client_registry import get_client, get_timeout
 
 logger = logging.getLogger(__name__)
 
+MODEL = "gpt-3.5-turbo"
+
 def ask_openai(prompt: str, purpose: str = "default") -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    openai = get_client("openai")
+    if openai is None:
         logger.error("OPENAI_API_KEY not set")
         return "Error: OpenAI API key missing"
-    
-    openai.api_key = api_key
+
     try:
         response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+            model=MODEL,
             messages=[
                 {"role": "system", "content": f"You are a helpful assistant for {purpose}."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            request_timeout=get_timeout()
         )
         return response.choices[0].message["content"]
     except Exception as e:
         logger.error(f"OpenAI API error: {e}", exc_info=True)
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+def stream_openai(prompt: str, purpose: str = "default") -> Iterator[str]:
+    """ask_openai'nin akış sürümü: yanıt metnini geldikçe parça parça üretir."""
+    openai = get_client("openai")
+    if openai is None:
+        logger.error("OPENAI_API_KEY not set")
+        yield "Error: OpenAI API key missing"
+        return
+
+    streamed = False
+    try:
+        response = openai.ChatCompletion.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": f"You are a helpful assistant for {purpose}."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            request_timeout=get_timeout(),
+            stream=True
+        )
+        for chunk in response:
+            text = chunk.choices[0].delta.get("content")
+            if text:
+                streamed = True
+                yield text
+    except Exception as e:
+        logger.error(f"OpenAI API error: {e}", exc_info=True)
+        if streamed:
+            raise # Parça gönderildikten sonra hata metni eklenirse yarım yanıt başarılı sayılırdı
+        yield f"Error: {str(e)}"
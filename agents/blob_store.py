@@ -0,0 +1,143 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Görseller ve diğer ikili varlıklar tüm siteler için tek bir içerik adresli depoda tutulur.
+# Site klasörlerine kopya yerine hardlink konur; aynı içerik diskte bir kez bulunur.
+_store = None
+_store_lock = threading.Lock()
+
+
+class BlobStore:
+    """
+    SHA-256 ile adreslenen paylaşımlı depo: <root>/<özetin ilk 2 hanesi>/<özet><uzantı>.
+    Blob'lar yazıldıktan sonra değişmez. Kaynak dosyaların özetleri (inode, mtime, boyut)
+    anahtarıyla bellekte tutulur; değişmeyen bir dosya (ve ona bağlı hardlink'ler) her
+    build'de yeniden okunmaz.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("BLOB_STORE_DIR", "output/blobs")
+        os.makedirs(self.root, exist_ok=True)
+        self._digests = {}  # (st_dev, st_ino, mtime_ns, size) -> özet
+        self._lock = threading.Lock()
+        # Dış kaynak anahtarı (ör. görsel URL'i) -> blob yolu; aynı kaynak ikinci kez indirilmez.
+        # Her takma ad <root>/aliases/ altında ayrı küçük bir dosyadır: yazma maliyeti toplam
+        # takma ad sayısından bağımsızdır.
+        self._aliases_dir = os.path.join(self.root, "aliases")
+        self._aliases = self._load_legacy_aliases()
+        self.stats = {"stored": 0, "deduplicated": 0, "linked": 0, "copied": 0}
+
+    def _load_legacy_aliases(self):
+        # Önceki sürümlerin tek dosyalık aliases.json'u yalnızca okunur
+        try:
+            with open(os.path.join(self.root, "aliases.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _alias_path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self._aliases_dir, digest[:2], digest)
+
+    def get_alias(self, key):
+        """key için kaydedilmiş blob yolu (blob hâlâ depodaysa), yoksa None."""
+        with self._lock:
+            blob_path = self._aliases.get(key)
+        if blob_path is None:
+            try:
+                with open(self._alias_path(key), "r", encoding="utf-8") as f:
+                    blob_path = f.read()
+            except OSError:
+                return None
+            with self._lock:
+                self._aliases[key] = blob_path
+        return blob_path if blob_path and os.path.exists(blob_path) else None
+
+    def set_alias(self, key, blob_path):
+        alias_path = self._alias_path(key)
+        os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+        tmp_path = f"{alias_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(blob_path)
+        os.replace(tmp_path, alias_path)
+        with self._lock:
+            self._aliases[key] = blob_path
+
+    def path_for(self, digest, ext=""):
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def _store(self, digest, ext, write):
+        blob_path = self.path_for(digest, ext)
+        if os.path.exists(blob_path):
+            with self._lock:
+                self.stats["deduplicated"] += 1
+            return blob_path
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, blob_path)  # Aynı blob'u eşzamanlı yazanlar aynı içeriği yazar
+        with self._lock:
+            self.stats["stored"] += 1
+        return blob_path
+
+    def put_bytes(self, data, ext=""):
+        """data'yı depoya ekler; (özet, blob yolu) döndürür."""
+        digest = hashlib.sha256(data).hexdigest()
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+
+        return digest, self._store(digest, ext, write)
+
+    def put_file(self, path):
+        """Dosyayı (uzantısıyla) depoya ekler; (özet, blob yolu) döndürür."""
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        ext = os.path.splitext(path)[1].lower()
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            with self._lock:
+                self._digests[key] = digest
+        return digest, self._store(digest, ext, lambda tmp_path: shutil.copyfile(path, tmp_path))
+
+    def link(self, blob_path, destination):
+        """
+        Blob'u destination'a hardlink ile bağlar (farklı dosya sistemlerinde kopyalar).
+        destination zaten varsa dokunulmaz: parmak izli adlar içerik değişince değişir.
+        """
+        if os.path.exists(destination):
+            return destination
+        tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(blob_path, tmp_path)
+            outcome = "linked"
+        except OSError:
+            shutil.copyfile(blob_path, tmp_path)
+            outcome = "copied"
+        os.replace(tmp_path, destination)
+        with self._lock:
+            self.stats[outcome] += 1
+        return destination
+
+
+def get_blob_store() -> BlobStore:
+    """Süreç genelinde paylaşılan depoyu döndürür; ilk çağrıda oluşturulur."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
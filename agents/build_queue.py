@@ -0,0 +1,99 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BuildQueue:
+    """
+    Site oluşturma işleri için iş kuyruğu. İşler sınırlı bir thread havuzunda eşzamanlı
+    çalışır; her işin durumu (queued / running / done / failed), aşaması ve ilerlemesi
+    job_id ile sorgulanabilir. Bir işin hatası diğer işleri etkilemez.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or int(os.getenv("SITE_BUILD_WORKERS", str(os.cpu_count() or 4)))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="SiteBuild")
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, topic, build_fn):
+        """
+        build_fn(progress_callback) çağrılacak bir iş ekler ve job_id döndürür.
+        progress_callback(stage, fraction) işin aşamasını günceller.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "topic": topic,
+                "status": "queued",
+                "stage": None,
+                "progress": 0.0,
+                "error": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            self._futures[job_id] = self._executor.submit(self._run, job_id, build_fn)
+        logger.info(f"Queued build job {job_id} for '{topic}'.")
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, build_fn):
+        self._update(job_id, status="running", started_at=time.time())
+
+        def progress_callback(stage, fraction):
+            self._update(job_id, stage=stage, progress=fraction)
+
+        try:
+            result = build_fn(progress_callback)
+        except Exception as e:
+            logger.error(f"Build job {job_id} failed: {e}", exc_info=True)
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            return None
+        if result:
+            self._update(job_id, status="done", progress=1.0, finished_at=time.time())
+        else:
+            self._update(job_id, status="failed", error="Build did not complete, see logs.", finished_at=time.time())
+        return result
+
+    def status(self, job_id=None):
+        """Tek bir işin (veya job_id verilmezse tüm işlerin) durum kopyasını döndürür."""
+        with self._lock:
+            if job_id is not None:
+                job = self._jobs.get(job_id)
+                return dict(job) if job else None
+            return [dict(job) for job in self._jobs.values()]
+
+    def summary(self):
+        """Durumlara göre iş sayıları, örn. {"queued": 3, "running": 4, "done": 10, "failed": 1}."""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+
+    def wait(self, job_ids=None, timeout=None):
+        """Verilen (veya tüm) işler bitene kadar bekler ve son durumlarını döndürür."""
+        with self._lock:
+            futures = [self._futures[j] for j in (job_ids or list(self._futures)) if j in self._futures]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                pass  # Hata zaten iş durumuna yazıldı veya zaman aşımı
+        return [self.status(j) for j in (job_ids or [job["job_id"] for job in self.status()])]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,246 @@
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Şablonlarda {{ slot_adi }} biçimindeki yer tutucular adlandırılmış slotlardır.
+_SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CompiledTemplate:
+    """
+    Bir kez derlenen şablon: kaynak metin sabit parçalar ve slot adları listesine bölünür.
+    render() yalnızca slotları doldurup parçaları birleştirir; DOM araması veya ayrıştırma yapılmaz.
+    Slot değerleri olduğu gibi eklenir, metin slotlarının kaçışlanması çağıranın sorumluluğundadır.
+    """
+
+    def __init__(self, source):
+        pieces = _SLOT_PATTERN.split(source)
+        self.literals = pieces[0::2]  # len(slots) + 1 adet
+        self.slots = pieces[1::2]
+
+    def render(self, **values):
+        out = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            out.append(str(values.get(slot, "")))
+            out.append(literal)
+        return "".join(out)
+
+
+BASE_LAYOUT = """<!DOCTYPE html>
+<html lang="{{ lang }}">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ title }}</title>
+    <link rel="stylesheet" href="{{ stylesheet }}">
+</head>
+<body class="theme-{{ theme }}">
+    <header>
+        <h1>{{ main_heading }}</h1>
+        <nav>
+            <ul>
+                <li><a href="#">Anasayfa</a></li>
+                <li><a href="#">Hakkımızda</a></li>
+                <li><a href="#">Ürünler</a></li>
+                <li><a href="#">İletişim</a></li>
+            </ul>
+        </nav>
+    </header>
+    <main>
+        <section id="content">
+            {{ content }}
+        </section>
+        <section id="banner-image-section">
+            {{ banner }}
+        </section>
+    </main>
+    <footer>
+        <p>&copy; {{ footer }}</p>
+    </footer>
+    {{ scripts }}
+</body>
+</html>"""
+
+BASE_CSS = """body {
+    font-family: sans-serif;
+    margin: 0; /* Reset default margin */
+    padding: 0; /* Reset default padding */
+    background-color: #f4f4f4;
+    color: #333;
+    line-height: 1.6;
+}
+
+header {
+    background-color: #333;
+    color: #fff;
+    padding: 1rem 0;
+    text-align: center;
+}
+
+header h1 {
+    margin: 0;
+    font-size: 2.5rem;
+}
+
+nav ul {
+    padding: 0;
+    list-style: none;
+    text-align: center;
+}
+
+nav ul li {
+    display: inline;
+    margin: 0 15px;
+}
+
+nav a {
+    color: #fff;
+    text-decoration: none;
+    font-size: 1.1rem;
+}
+
+nav a:hover {
+    text-decoration: underline;
+}
+
+main {
+    padding: 20px;
+    background-color: #fff;
+    margin: 20px;
+    border: 1px solid #ddd;
+    border-radius: 5px;
+}
+
+#content h2 {
+    color: #333;
+}
+
+#content img {
+    max-width: 100%;
+    height: auto;
+    margin: 10px 0;
+    border-radius: 4px;
+}
+#banner-image-section img {
+    max-width: 100%;
+    height: auto;
+    display: block;
+    margin: 20px auto;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+}
+
+
+footer {
+    text-align: center;
+    padding: 20px 0;
+    margin-top: 20px;
+    background-color: #333;
+    color: #fff;
+}
+
+/* Form Styles */
+form {
+    background: #f9f9f9;
+    padding: 20px;
+    border-radius: 5px;
+    border: 1px solid #eee;
+}
+
+form div {
+    margin-bottom: 15px;
+}
+
+form label {
+    display: block;
+    margin-bottom: 5px;
+    font-weight: bold;
+}
+
+form input[type="text"],
+form input[type="email"],
+form textarea {
+    width: calc(100% - 22px); /* Adjust for padding and border */
+    padding: 10px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+    box-sizing: border-box; /* Include padding and border in the element's total width and height */
+}
+
+form textarea {
+    height: 100px;
+    resize: vertical;
+}
+
+form button[type="submit"] {
+    background-color: #5cb85c;
+    color: white;
+    padding: 10px 15px;
+    border: none;
+    border-radius: 4px;
+    cursor: pointer;
+    font-size: 1rem;
+}
+
+form button[type="submit"]:hover {
+    background-color: #4cae4c;
+}
+
+/* List Styles */
+#content ul {
+  list-style: disc;
+  padding-left: 20px;
+}
+"""
+
+FUTURISTIC_CSS = BASE_CSS + """
+/* Futuristic Theme */
+body.theme-futuristic {
+    font-family: "Segoe UI", Roboto, sans-serif;
+    background-color: #0b0f1a;
+    color: #d8e1f0;
+}
+
+body.theme-futuristic header,
+body.theme-futuristic footer {
+    background: linear-gradient(90deg, #0f2027, #203a43, #2c5364);
+}
+
+body.theme-futuristic main {
+    background-color: #121a2b;
+    border-color: #1f2d4a;
+}
+
+body.theme-futuristic #content h2 {
+    color: #4fd1ff;
+}
+
+body.theme-futuristic form {
+    background: #16213a;
+    border-color: #1f2d4a;
+}
+"""
+
+# Tema adı -> (HTML düzeni, CSS). Temalar aynı slot setini paylaşır.
+THEMES = {
+    "basic": (BASE_LAYOUT, BASE_CSS),
+    "futuristic": (BASE_LAYOUT, FUTURISTIC_CSS),
+}
+DEFAULT_THEME = "basic"
+
+
+def resolve_theme(theme):
+    if theme in THEMES:
+        return theme
+    if theme:
+        logger.warning(f"Unknown theme '{theme}', falling back to '{DEFAULT_THEME}'.")
+    return DEFAULT_THEME
+
+
+@lru_cache(maxsize=None)
+def get_theme(theme):
+    """Temanın derlenmiş HTML şablonunu ve CSS'ini döndürür; her tema süreç başına bir kez derlenir."""
+    layout, css = THEMES[resolve_theme(theme)]
+    return CompiledTemplate(layout), css
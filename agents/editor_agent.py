@@ -1,16 +1,39 @@
 # agents/editor_agent.py
 from agents.base_agent import BaseAgent
+from agents.http_client import get_session
+from agents.scrape_cache import ScrapeCache
+from agents.provider_router import generate_content
+from agents.blob_store import get_blob_store
+from agents.static_files import name_for_digest
 import requests
 from bs4 import BeautifulSoup
 import logging # Logging için eklendi
+import os
+import time
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# İndirilen görsellerin Content-Type'ına göre dosya uzantısı
+_IMAGE_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif",
+                     "image/avif": ".avif", "image/svg+xml": ".svg"}
+
 class EditorAgent(BaseAgent):
-    def __init__(self, name="Editor Agent"):
+    def __init__(self, name="Editor Agent", max_workers=None, section_timeout=None, scrape_cache=None):
         super().__init__(name)
+        self.scrape_cache = scrape_cache or ScrapeCache()
+        # Bağımsız bölümler (web_scrape, images ...) eşzamanlı işlenir. 1 verilirse sıralı çalışır.
+        self.max_workers = max_workers or int(os.getenv("EDITOR_MAX_WORKERS", "4"))
+        self.section_timeout = section_timeout or float(os.getenv("EDITOR_SECTION_TIMEOUT", "30"))
+        # İndirilemeyen görseller için yer tutucu üreteci; tek örnek paylaşılır ki index.json'u
+        # eşzamanlı bölümler birbirinin üzerine yazmasın
+        self._image_generator = None
+        self._image_generator_lock = threading.Lock()
 
     def _find_relevant_text(self, topic, num_paragraphs=1):
         """
@@ -26,7 +49,7 @@ class EditorAgent(BaseAgent):
             # Basit bir arama motoru URL'i, gerçek bir API daha iyi olurdu.
             # DuckDuckGo HTML sonuçları daha parse edilebilir olabilir.
             # response = requests.get(f"https://html.duckduckgo.com/html/?q={search_query}", headers=headers, timeout=10)
-            response = requests.get(f"https://www.google.com/search?q={search_query}", headers=headers, timeout=10)
+            response = get_session().get(f"https://www.google.com/search?q={search_query}", headers=headers, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -106,6 +129,68 @@ class EditorAgent(BaseAgent):
         return image_links[:num_images]
 
 
+    def _download_image(self, url):
+        """Görseli indirip blob deposuna ekler ve blob yolunu döndürür; aynı URL bir kez indirilir."""
+        store = get_blob_store()
+        blob_path = store.get_alias(url)
+        if blob_path:
+            return blob_path
+        response = get_session().get(url, timeout=10)
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith("image/"):
+            raise ValueError(f"Unexpected content type '{content_type}' for {url}")
+        _, blob_path = store.put_bytes(response.content, _IMAGE_EXTENSIONS.get(content_type, ".jpg"))
+        store.set_alias(url, blob_path)
+        return blob_path
+
+    def _generate_image(self, topic):
+        """İndirilemeyen görselin yerine yerel bir yer tutucu üretir (Pillow yoksa None)."""
+        with self._image_generator_lock:
+            if self._image_generator is None:
+                try:
+                    from agents.helper_agents.image_generator_agent import ImageGeneratorAgent
+                except ImportError:
+                    return None
+                self._image_generator = ImageGeneratorAgent()
+            generated = self._image_generator.generate_batch([{"prompt": topic}])[0]
+        if not os.path.isfile(generated):
+            return None
+        return get_blob_store().put_file(generated)[1]
+
+    def _materialize_images(self, image_urls, topic):
+        """
+        Bölüm görsellerini build sırasında bir kez, eşzamanlı olarak indirir (olmazsa yerelde
+        üretir) ve blob deposuna koyar. Sayfa dış sunuculara değil yerel kopyalara bağlanır.
+        Her görsel için (src, blob yolu) döndürür; ikisi de başarısızsa (URL, None).
+        """
+        if not image_urls:
+            return []
+
+        def download(url):
+            try:
+                return self._download_image(url)
+            except Exception as e:
+                logger.warning(f"Could not download image {url}: {e}. Generating a local placeholder.")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(image_urls)),
+                                thread_name_prefix="EditorImage") as executor:
+            blob_paths = list(executor.map(download, image_urls))
+        if None in blob_paths:
+            # Yer tutucu konuya göre üretilir; başarısız görseller için havuz bittikten sonra bir kez
+            placeholder = self._generate_image(topic)
+            blob_paths = [blob_path or placeholder for blob_path in blob_paths]
+
+        materialized = []
+        for url, blob_path in zip(image_urls, blob_paths):
+            if blob_path is None:
+                materialized.append((url, None))
+                continue
+            digest, ext = os.path.splitext(os.path.basename(blob_path))
+            materialized.append((name_for_digest(f"image{ext}", digest), blob_path))
+        return materialized
+
     def _generate_form(self):
         """Basit bir iletişim formu HTML'i oluşturur."""
         return """
@@ -126,43 +211,82 @@ class EditorAgent(BaseAgent):
         </form>
         """
 
+    def _extract_text(self, html, url, selector):
+        """Sayfa HTML'inden seçiciyle eşleşen anlamlı metni çıkarır. (metin, önbelleğe_alınabilir) döner."""
+        soup = BeautifulSoup(html, 'html.parser')
+        elements = soup.select(selector)
+
+        if not elements:
+            logger.warning(f"No elements found with selector '{selector}' at {url}.")
+            # Fallback to trying to get all paragraphs if specific selector fails
+            elements = soup.find_all('p')
+            if not elements:
+                logger.warning(f"No paragraph elements found either at {url}.")
+                return "Belirtilen URL'den içerik alınamadı veya seçiciyle eşleşen element bulunamadı.", False
+
+        # İlk birkaç paragrafı veya anlamlı bir bölümü alalım
+        content_parts = []
+        char_count = 0
+        for element in elements:
+            text = element.get_text(separator=' ', strip=True)
+            if len(text) > 50: # Çok kısa metinleri atlayalım
+                content_parts.append(text)
+                char_count += len(text)
+                if char_count > 2000 and len(content_parts) > 2 : # Çok uzun olmasın
+                    break
+        content = "\n\n".join(content_parts)
+        if not content:
+            return "Belirtilen URL veya seçici ile anlamlı içerik bulunamadı.", False
+        return content, True
+
     def _scrape_web(self, url, selector="p"):
-        """Belirtilen URL'den metin içeriği çeker."""
+        """
+        Belirtilen URL'den metin içeriği çeker.
+        Sonuçlar ScrapeCache'te tutulur: taze kayıtlar ağa gitmeden döner, süresi geçmiş
+        kayıtlar ETag/Last-Modified ile koşullu GET'le yeniden doğrulanır.
+        """
+        cached = self.scrape_cache.get(url, selector)
+        if cached and cached["fresh"]:
+            self.scrape_cache.record_hit()
+            logger.info(f"Scrape cache hit for {url} (selector '{selector}')")
+            return cached["text"]
+
         logger.info(f"Scraping web content from {url} using selector '{selector}'")
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        headers.update(self.scrape_cache.conditional_headers(cached))
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
+            response = get_session().get(url, headers=headers, timeout=15)
+            if response.status_code == 304 and cached:
+                self.scrape_cache.record_revalidated()
+                self.scrape_cache.touch(url, selector)
+                logger.info(f"Content not modified at {url}, using cached text.")
+                return cached["text"]
             response.raise_for_status()
+            self.scrape_cache.record_miss()
             logger.info(f"Web scraping successful. Status code: {response.status_code} from {url}")
-            soup = BeautifulSoup(response.text, 'html.parser')
-            elements = soup.select(selector)
-            
-            if not elements:
-                logger.warning(f"No elements found with selector '{selector}' at {url}.")
-                # Fallback to trying to get all paragraphs if specific selector fails
-                elements = soup.find_all('p')
-                if not elements:
-                    logger.warning(f"No paragraph elements found either at {url}.")
-                    return "Belirtilen URL'den içerik alınamadı veya seçiciyle eşleşen element bulunamadı."
-
-            # İlk birkaç paragrafı veya anlamlı bir bölümü alalım
-            content_parts = []
-            char_count = 0
-            for element in elements:
-                text = element.get_text(separator=' ', strip=True)
-                if len(text) > 50: # Çok kısa metinleri atlayalım
-                    content_parts.append(text)
-                    char_count += len(text)
-                    if char_count > 2000 and len(content_parts) > 2 : # Çok uzun olmasın
-                        break
-            content = "\n\n".join(content_parts)
-            return content if content else "Belirtilen URL veya seçici ile anlamlı içerik bulunamadı."
+            content, cacheable = self._extract_text(response.text, url, selector)
+            if cacheable:
+                self.scrape_cache.put(url, selector, content,
+                                      etag=response.headers.get("ETag"),
+                                      last_modified=response.headers.get("Last-Modified"))
+            return content
         except requests.exceptions.Timeout:
             logger.error(f"Timeout during web scraping from {url}.")
+            if cached: # Ağ hatasında eski de olsa önbellekteki içerik boş sayfadan iyidir
+                return cached["text"]
             return "Web içeriği alınırken zaman aşımı oluştu."
         except requests.exceptions.RequestException as e:
             logger.error(f"Web scraping error from {url}: {e}")
+            if cached:
+                return cached["text"]
             return f"Web içeriği alınamadı: {e}"
-    
+
+    def _ai_prompt(self, section_info, topic):
+        """'ai' kaynaklı bölüm için (prompt, purpose) çiftini döndürür."""
+        prompt = section_info.get("prompt") or f"'{topic}' konulu web sitesinin '{section_info.get('title', 'Bölüm')}' bölümü için kısa bir metin yaz."
+        purpose = section_info.get("purpose", "website content")
+        return prompt, purpose
+
     def _process_source(self, section_info, topic):
         """Bölüm kaynağına göre içeriği işler."""
         source_type = section_info.get("source")
@@ -181,6 +305,9 @@ class EditorAgent(BaseAgent):
                 logger.error("Web scrape source specified but no URL provided.")
                 return "Web kazıma için URL belirtilmemiş."
             return self._scrape_web(url, selector)
+        elif source_type == "ai":
+            prompt, purpose = self._ai_prompt(section_info, topic)
+            return generate_content(prompt, purpose)
         elif source_type == "api":
             # API veri çekme mantığını buraya ekleyeceğiz
             logger.info("API source type (not yet implemented).")
@@ -195,6 +322,134 @@ class EditorAgent(BaseAgent):
             logger.info(f"Defaulting to web search for section '{section_info.get('title')}' on topic '{topic}'.")
             return self._find_relevant_text(topic) 
 
+    def _process_section(self, section_info, topic):
+        """Tek bir bölümü işler ve {"title", "content", "assets"} sözlüğü döndürür."""
+        section_title = section_info.get("title", "Bölüm Başlığı")
+        section_type = section_info.get("type", "text")
+        logger.info(f"Processing section: '{section_title}' of type '{section_type}'")
+
+        content_html = ""
+        assets = {} # Sayfanın yanında yayınlanacak yerel dosyalar: ad -> blob yolu
+
+        if section_type == "text":
+            content_html = self._process_source(section_info, topic)
+        elif section_type == "list":
+            items = section_info.get("items", [])
+            if items:
+                list_items_html = "<ul>\n"
+                for item in items:
+                    list_items_html += f"  <li>{item}</li>\n"
+                list_items_html += "</ul>"
+                content_html = list_items_html
+            else:
+                content_html = "<p>Bu bölümde listelenecek öğe bulunmuyor.</p>"
+        elif section_type == "images": # Bu bölüm içindeki görselleri ifade eder
+            num_images = section_info.get("count", 1)
+            # Konu başlığına göre veya bölüm başlığına göre görsel aranabilir.
+            image_search_topic = section_info.get("image_topic", section_title) # Bölüme özel görsel konusu
+            relevant_image_urls = self._find_relevant_images(image_search_topic, num_images)
+            images = self._materialize_images(relevant_image_urls, image_search_topic)
+            if images:
+                assets = {src: blob_path for src, blob_path in images if blob_path}
+                content_html = "".join([f'<img src="{src}" alt="{section_title} için görsel" style="max-width: 100%; height: auto; margin: 5px;">' for src, _ in images])
+            else:
+                content_html = "<p>Bu bölüm için uygun görsel bulunamadı.</p>"
+        elif section_type == "form":
+            content_html = self._generate_form()
+        else:
+            logger.warning(f"Unsupported section type: {section_type}")
+            content_html = f"<p>Bu bölüm türü ('{section_type}') desteklenmiyor.</p>"
+
+        return {"title": section_title, "content": content_html, "assets": assets}
+
+    @staticmethod
+    def section_hash(section_info):
+        """Bölüm spec'inin kararlı özeti (manifest anahtarı)."""
+        raw = json.dumps(section_info, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _process_section_incremental(self, section_info, topic, manifest):
+        """
+        Manifest'e göre bölümü işler. Spec'i değişmemiş bölümlerin önceki HTML'i yeniden
+        kullanılır; dış kaynaklı (web_scrape) bölümler yine çekilir (ScrapeCache sayesinde
+        çoğunlukla yerel okuma veya 304) ve kaynak özeti değişmemişse eski parça korunur.
+        Dönen sözlükte spec_hash, source_hash ve reused alanları bulunur.
+        """
+        spec_hash = self.section_hash(section_info)
+        previous = (manifest or {}).get(spec_hash)
+        live_source = section_info.get("type", "text") == "text" and section_info.get("source") == "web_scrape"
+
+        if previous and not live_source:
+            logger.info(f"Section '{section_info.get('title')}' unchanged, reusing cached fragment.")
+            return {"title": previous["title"], "content": previous["content"], "assets": previous.get("assets", {}),
+                    "spec_hash": spec_hash, "source_hash": previous.get("source_hash"), "reused": True}
+
+        section = self._process_section(section_info, topic)
+        source_hash = hashlib.sha256(section["content"].encode("utf-8")).hexdigest()
+        reused = bool(previous) and previous.get("source_hash") == source_hash
+        section.update({"spec_hash": spec_hash, "source_hash": source_hash, "reused": reused})
+        return section
+
+    def _process_sections(self, sections_data, topic, task):
+        """
+        Bölümleri işler. max_workers > 1 ise bölümler sınırlı bir thread havuzunda
+        eşzamanlı işlenir; sonuçlar her durumda spec sırasıyla döner.
+        Her bölümün kendi zaman aşımı vardır (section["timeout"] veya task["section_timeout"]).
+        """
+        manifest = task.get("manifest")  # spec_hash -> önceki {"title", "content", "source_hash"}
+        max_workers = int(task.get("max_workers", self.max_workers))
+        default_timeout = float(task.get("section_timeout", self.section_timeout))
+
+        if max_workers <= 1 or len(sections_data) <= 1:
+            return [self._process_section_incremental(section_info, topic, manifest) for section_info in sections_data]
+
+        workers = min(max_workers, len(sections_data))
+        # Bölüm en fazla bu kadar "dalga" boyunca kuyrukta bekleyebilir (önündeki her dalga kendi süresini kullanır)
+        waves = -(-len(sections_data) // workers)
+        started_events = [threading.Event() for _ in sections_data]
+        started_at = [None] * len(sections_data)
+
+        def run(index, section_info):
+            started_at[index] = time.monotonic()
+            started_events[index].set()
+            return self._process_section_incremental(section_info, topic, manifest)
+
+        def placeholder(section_info, message):
+            # Normal sonuçla aynı alanlar; "failed" bölümler manifest'e yazılmaz, sonraki build'de yeniden denenir
+            return {"title": section_info.get("title", "Bölüm Başlığı"), "content": message, "assets": {},
+                    "spec_hash": self.section_hash(section_info), "source_hash": None, "reused": False,
+                    "failed": True}
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="EditorSection")
+        try:
+            submitted_at = time.monotonic()
+            futures = [executor.submit(run, index, section_info) for index, section_info in enumerate(sections_data)]
+            processed_sections = []
+            for index, (section_info, future) in enumerate(zip(sections_data, futures)):
+                section_title = section_info.get("title", "Bölüm Başlığı")
+                timeout = float(section_info.get("timeout", default_timeout))
+                # Zaman aşımı bölüm bir worker'da çalışmaya başladığı andan sayılır; havuz dolu
+                # olduğu için kuyrukta geçen süre bölümün kendi süresinden düşülmez.
+                queue_remaining = max(0.0, submitted_at + timeout * waves - time.monotonic())
+                try:
+                    if not started_events[index].wait(timeout=queue_remaining):
+                        raise FuturesTimeoutError()
+                    remaining = max(0.0, started_at[index] + timeout - time.monotonic())
+                    processed_sections.append(future.result(timeout=remaining))
+                except FuturesTimeoutError:
+                    future.cancel()
+                    logger.error(f"Section '{section_title}' timed out after {timeout}s.")
+                    processed_sections.append(placeholder(
+                        section_info, "<p>Bu bölümün içeriği zaman aşımı nedeniyle alınamadı.</p>"))
+                except Exception as e:
+                    logger.error(f"Error processing section '{section_title}': {e}", exc_info=True)
+                    processed_sections.append(placeholder(
+                        section_info, "<p>Bu bölümün içeriği işlenirken bir hata oluştu.</p>"))
+            return processed_sections
+        finally:
+            # Zaman aşımına uğrayan bölümleri beklemeden dön
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def execute(self, task): # İmza zaten task alıyordu
         logger.info(f"Editor Agent starting content generation for task: {task.get('topic')}")
         topic = task.get("topic", "General Topic")
@@ -210,42 +465,7 @@ class EditorAgent(BaseAgent):
         top_level_images = user_content_spec.get("images", [])
         top_level_videos = user_content_spec.get("videos", [])
 
-        processed_sections = []
-        for section_info in sections_data:
-            section_title = section_info.get("title", "Bölüm Başlığı")
-            section_type = section_info.get("type", "text")
-            logger.info(f"Processing section: '{section_title}' of type '{section_type}'")
-            
-            content_html = ""
-
-            if section_type == "text":
-                content_html = self._process_source(section_info, topic)
-            elif section_type == "list":
-                items = section_info.get("items", [])
-                if items:
-                    list_items_html = "<ul>\n"
-                    for item in items:
-                        list_items_html += f"  <li>{item}</li>\n"
-                    list_items_html += "</ul>"
-                    content_html = list_items_html
-                else:
-                    content_html = "<p>Bu bölümde listelenecek öğe bulunmuyor.</p>"
-            elif section_type == "images": # Bu bölüm içindeki görselleri ifade eder
-                num_images = section_info.get("count", 1)
-                # Konu başlığına göre veya bölüm başlığına göre görsel aranabilir.
-                image_search_topic = section_info.get("image_topic", section_title) # Bölüme özel görsel konusu
-                relevant_image_urls = self._find_relevant_images(image_search_topic, num_images)
-                if relevant_image_urls:
-                    content_html = "".join([f'<img src="{img_url}" alt="{section_title} için görsel" style="max-width: 100%; height: auto; margin: 5px;">' for img_url in relevant_image_urls])
-                else:
-                    content_html = "<p>Bu bölüm için uygun görsel bulunamadı.</p>"
-            elif section_type == "form":
-                content_html = self._generate_form()
-            else:
-                logger.warning(f"Unsupported section type: {section_type}")
-                content_html = f"<p>Bu bölüm türü ('{section_type}') desteklenmiyor.</p>"
-
-            processed_sections.append({"title": section_title, "content": content_html})
+        processed_sections = self._process_sections(sections_data, topic, task)
 
         content_data_for_manager = {
             "page_title": final_title, # Sayfa başlığı (HTML <title> için)
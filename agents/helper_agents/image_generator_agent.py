@@ -1,37 +1,146 @@
+import io
 import os
-import uuid
+import json
+import hashlib
+import threading
 import logging
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 from agents.base_agent import BaseAgent
+from agents.blob_store import get_blob_store
 
 logger = logging.getLogger(__name__)
 
+# Yer tutucu görsel stilleri: arka plan ve yazı rengi
+STYLES = {
+    "default": {"background": (73, 109, 137), "text": (255, 255, 0)},
+    "dark": {"background": (24, 24, 32), "text": (230, 230, 230)},
+    "light": {"background": (240, 240, 235), "text": (40, 40, 40)},
+}
+
+_font = None
+
+
+def _init_worker():
+    """Her worker sürecinde bir kez çalışır: font yalnızca burada yüklenir."""
+    global _font
+    if _font is None:
+        _font = ImageFont.load_default()
+
+
+@lru_cache(maxsize=64)
+def _base_canvas(width, height, style):
+    return Image.new('RGB', (width, height), color=STYLES[style]["background"])
+
+
+def _render_png(prompt, width, height, style):
+    """Görseli çizer ve PNG baytlarını döndürür (worker süreçlerinde çalışır, picklable olmalı)."""
+    _init_worker()
+    img = _base_canvas(width, height, style).copy()
+    draw = ImageDraw.Draw(img)
+    text_bbox = draw.textbbox((0, 0), prompt, font=_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    draw.text(((width - text_width) / 2, (height - text_height) / 2), prompt, fill=STYLES[style]["text"], font=_font)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
 class ImageGeneratorAgent(BaseAgent):
-    def __init__(self, name="Image Generator Agent"):
+    """
+    Yer tutucu görsel üretir. generate_batch() çok sayıda (prompt, boyut, stil) isteğini bir süreç
+    havuzunda işler; sonuçlar (prompt, boyut, stil) anahtarıyla saklanır ve tekrar istenen bir
+    görsel yeniden çizilmeden mevcut dosyayla döndürülür.
+    """
+    def __init__(self, name="Image Generator Agent", max_workers=None):
         super().__init__(name)
         self.output_folder = "output/generated_images"
         os.makedirs(self.output_folder, exist_ok=True)
+        self.max_workers = max_workers or int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 4)))
+        self._index_path = os.path.join(self.output_folder, "index.json")
+        self._index = self._load_index() # anahtar -> dosya yolu
+        self._lock = threading.Lock()
 
-    def execute(self, task=None):
-        prompt = task.get("prompt", "Default Topic") if task else "Default Topic"
-        width = task.get("width", 300) if task else 300
-        height = task.get("height", 200) if task else 200
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
+    def _save_index(self):
+        with self._lock:
+            snapshot = dict(self._index)
+        tmp_path = f"{self._index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self._index_path)
+
+    @staticmethod
+    def _normalize(task):
+        task = task or {}
+        style = task.get("style", "default")
+        return (task.get("prompt", "Default Topic"), int(task.get("width", 300)), int(task.get("height", 200)),
+                style if style in STYLES else "default")
+
+    @staticmethod
+    def _cache_key(prompt, width, height, style):
+        return hashlib.sha256(json.dumps([prompt, width, height, style], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _cached_path(self, key):
+        with self._lock:
+            path = self._index.get(key)
+        return path if path and os.path.exists(path) else None
+
+    def _store(self, key, prompt, png_bytes):
+        # Aynı görsel blob deposunda tek kopya olarak tutulur; dosya adı içerik özetinden türetilir
+        digest, blob_path = get_blob_store().put_bytes(png_bytes, ".png")
+        filename = f"{prompt.replace(' ', '_')}_{digest[:12]}.png"
+        filepath = get_blob_store().link(blob_path, os.path.join(self.output_folder, filename))
+        with self._lock:
+            self._index[key] = filepath
+        return filepath
+
+    @staticmethod
+    def _placeholder_url(prompt, width, height):
+        return f"https://via.placeholder.com/{width}x{height}.png?text={prompt.replace(' ', '+')}"
+
+    def generate_batch(self, tasks, max_workers=None):
+        """
+        tasks: [{"prompt", "width", "height", "style"}, ...]. Sonuçları aynı sırada dosya yolları
+        (hata durumunda yer tutucu URL) olarak döndürür. Önbellekte olanlar ve aynı batch
+        içindeki tekrarlar yeniden çizilmez.
+        """
+        specs = [self._normalize(task) for task in tasks]
+        keys = [self._cache_key(*spec) for spec in specs]
+        results = {key: self._cached_path(key) for key in keys}
+        pending = {key: spec for key, spec in zip(keys, specs) if results[key] is None}
+        logger.info(f"{self.name}: {len(specs)} image(s) requested, {len(pending)} to render.")
+
+        if pending:
+            pending_keys = list(pending)
+            args = list(zip(*pending.values()))
+            workers = min(max_workers or self.max_workers, len(pending_keys))
+            try:
+                if workers > 1:
+                    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                        rendered = list(pool.map(_render_png, *args,
+                                                 chunksize=max(1, len(pending_keys) // (workers * 4))))
+                else:
+                    rendered = [_render_png(*pending[key]) for key in pending_keys]
+                for key, png_bytes in zip(pending_keys, rendered):
+                    results[key] = self._store(key, pending[key][0], png_bytes)
+            except Exception as e:
+                logger.error(f"{self.name}: Error generating images: {e}", exc_info=True)
+            self._save_index()
+
+        return [results[key] or self._placeholder_url(*spec[:3]) for key, spec in zip(keys, specs)]
+
+    def execute(self, task=None):
+        prompt, width, height, _ = self._normalize(task)
         logger.info(f"{self.name}: Generating image for '{prompt}' ({width}x{height})")
-        try:
-            img = Image.new('RGB', (width, height), color=(73, 109, 137))
-            draw = ImageDraw.Draw(img)
-            font = ImageFont.load_default()
-            text_bbox = draw.textbbox((0, 0), prompt, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            draw.text(((width - text_width) / 2, (height - text_height) / 2), prompt, fill=(255, 255, 0), font=font)
-            
-            filename = f"{prompt.replace(' ', '_')}_{uuid.uuid4().hex[:6]}.png"
-            filepath = os.path.join(self.output_folder, filename)
-            img.save(filepath)
-            logger.info(f"{self.name}: Image saved to {filepath}")
-            return [filepath]
-        except Exception as e:
-            logger.error(f"{self.name}: Error generating image: {e}", exc_info=True)
-            return [f"https://via.placeholder.com/{width}x{height}.png?text={prompt.replace(' ', '+')}"]
\ No newline at end of file
+        filepath = self.generate_batch([task or {}], max_workers=1)[0]
+        logger.info(f"{self.name}: Image saved to {filepath}")
+        return [filepath]
@@ -1,45 +1,225 @@
 import os
-import subprocess
+import time
 import uuid
+import json
+import hashlib
+import threading
+import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
 class VideoGeneratorAgent(BaseAgent):
-    def __init__(self, name="Video Generator Agent"):
+    """
+    ffmpeg render'ları için iş kuyruğu. submit() beklemeden job_id döndürür; aynı anda en fazla
+    max_concurrent encode çalışır (VIDEO_MAX_CONCURRENT). İlerleme ffmpeg'in -progress çıktısından
+    okunur, işler cancel() ile durdurulabilir. Sonuçlar (prompt, süre, çözünürlük) anahtarıyla
+    saklanır: aynı video ikinci kez encode edilmez, sürmekte olan aynı iş paylaşılır.
+    """
+    def __init__(self, name="Video Generator Agent", max_concurrent=None):
         super().__init__(name)
         self.output_folder = "output/generated_videos"
         os.makedirs(self.output_folder, exist_ok=True)
+        self.max_concurrent = max_concurrent or int(os.getenv("VIDEO_MAX_CONCURRENT", str(max(1, (os.cpu_count() or 2) // 2))))
+        self.ffmpeg_threads = os.getenv("VIDEO_FFMPEG_THREADS") # Boşsa ffmpeg kendisi seçer
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="VideoEncode")
+        self._jobs = {}
+        self._futures = {}
+        self._processes = {} # job_id -> çalışan ffmpeg süreci
+        self._active_by_key = {} # önbellek anahtarı -> bitmemiş job_id
+        self._lock = threading.Lock()
 
-    def execute(self, task=None):
-        prompt = task.get("prompt", "Default Video Topic") if task else "Default Video Topic"
-        duration = task.get("duration", 10) if task else 10  # seconds
+    @staticmethod
+    def _normalize(task):
+        task = task or {}
+        return (task.get("prompt", "Default Video Topic"), float(task.get("duration", 10)),
+                task.get("resolution", "640x480"))
 
-        logger.info(f"{self.name}: Generating video for '{prompt}' with duration {duration}s")
-        
+    @staticmethod
+    def _cache_key(prompt, duration, resolution):
+        return hashlib.sha256(json.dumps([prompt, duration, resolution], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _output_path(self, prompt, key):
+        return os.path.join(self.output_folder, f"video_{prompt.replace(' ', '_')}_{key[:12]}.mp4")
+
+    def submit(self, task=None):
+        """Render işini kuyruğa ekler ve job_id döndürür. Sonuç önbellekteyse iş hemen 'done' olur."""
+        prompt, duration, resolution = self._normalize(task)
+        key = self._cache_key(prompt, duration, resolution)
+        filepath = self._output_path(prompt, key)
+        with self._lock:
+            active = self._active_by_key.get(key)
+            if active:
+                return active
+            job_id = uuid.uuid4().hex[:12]
+            cached = os.path.exists(filepath)
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "prompt": prompt,
+                "status": "done" if cached else "queued",
+                "progress": 1.0 if cached else 0.0,
+                "cached": cached,
+                "result": filepath if cached else None,
+                "error": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": time.time() if cached else None,
+            }
+            if cached:
+                logger.info(f"{self.name}: Reusing cached video {filepath}")
+                return job_id
+            self._active_by_key[key] = job_id
+            self._futures[job_id] = self._executor.submit(self._run, job_id, key, prompt, duration, resolution, filepath)
+        logger.info(f"{self.name}: Queued video job {job_id} for '{prompt}' ({duration}s, {resolution})")
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, key, prompt, duration, resolution, filepath):
+        # Yarım kalan encode önbelleğe girmesin diye geçici dosyaya yazılır
+        tmp_path = f"{filepath[:-4]}.{job_id}.tmp.mp4"
+        process = None
         try:
-            # Generate a unique filename
-            filename = f"video_{prompt.replace(' ', '_')}_{uuid.uuid4().hex[:6]}.mp4"
-            filepath = os.path.join(self.output_folder, filename)
-            
-            # FFmpeg command: Create a video with a black background and text
+            with self._lock:
+                if self._jobs[job_id]["status"] == "cancelled":
+                    return None
+                self._jobs[job_id].update(status="running", started_at=time.time())
             cmd = [
                 "ffmpeg",
                 "-f", "lavfi",
-                "-i", f"color=c=black:s=640x480:d={duration}",
+                "-i", f"color=c=black:s={resolution}:d={duration}",
                 "-vf", f"drawtext=text='{prompt}':fontcolor=white:fontsize=24:x=(w-text_w)/2:y=(h-text_h)/2",
                 "-c:a", "aac",
                 "-strict", "experimental",
-                "-y",  # Overwrite output file if it exists
-                filepath
+                "-progress", "pipe:1", "-nostats", "-loglevel", "error",
             ]
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            if self.ffmpeg_threads:
+                cmd += ["-threads", self.ffmpeg_threads]
+            cmd += ["-y", tmp_path]
+            try:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            except FileNotFoundError:
+                logger.error(f"{self.name}: FFmpeg not found. Please install FFmpeg.")
+                self._update(job_id, status="failed", error="FFmpeg not installed", finished_at=time.time())
+                return None
+            # stderr ayrı bir thread'de okunur: stdout okunurken stderr borusu dolarsa ffmpeg kilitlenir
+            stderr_parts = []
+            stderr_reader = threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()),
+                                             name=f"VideoStderr-{job_id}", daemon=True)
+            stderr_reader.start()
+            with self._lock:
+                self._processes[job_id] = process
+                cancelled = self._jobs[job_id]["status"] == "cancelled"
+            if cancelled: # cancel() süreç kaydedilmeden önce çağrıldıysa
+                process.terminate()
+
+            # -progress çıktısı "anahtar=değer" satırlarıdır; out_time_us geçen süreyi verir
+            for line in process.stdout:
+                name, _, value = line.strip().partition("=")
+                if name in ("out_time_us", "out_time_ms") and value.isdigit() and duration > 0:
+                    self._update(job_id, progress=min(1.0, int(value) / 1_000_000 / duration))
+            returncode = process.wait()
+            stderr_reader.join()
+            stderr = "".join(stderr_parts)
+
+            with self._lock:
+                self._processes.pop(job_id, None)
+                cancelled = self._jobs[job_id]["status"] == "cancelled"
+            if cancelled or returncode != 0:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if not cancelled:
+                    logger.error(f"{self.name}: FFmpeg error for job {job_id}: {stderr.strip()}")
+                    self._update(job_id, status="failed", error=stderr.strip() or f"ffmpeg exited with {returncode}",
+                                 finished_at=time.time())
+                return None
+            os.replace(tmp_path, filepath)
+            self._update(job_id, status="done", progress=1.0, result=filepath, finished_at=time.time())
             logger.info(f"{self.name}: Video saved to {filepath}")
-            return [filepath]
-        except subprocess.CalledProcessError as e:
-            logger.error(f"{self.name}: FFmpeg error: {e}", exc_info=True)
-            return ["Error: Video generation failed"]
-        except FileNotFoundError:
-            logger.error(f"{self.name}: FFmpeg not found. Please install FFmpeg.")
-            return ["Error: FFmpeg not installed"]
\ No newline at end of file
+            return filepath
+        except Exception as e:
+            # Popen'ın izin hatası, os.replace hatası vb.: iş "running" durumunda asılı kalmasın
+            logger.error(f"{self.name}: Video job {job_id} failed: {e}", exc_info=True)
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+            with self._lock:
+                self._processes.pop(job_id, None)
+                if self._jobs[job_id]["status"] != "cancelled":
+                    self._jobs[job_id].update(status="failed", error=str(e), finished_at=time.time())
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+        finally:
+            with self._lock:
+                if self._active_by_key.get(key) == job_id:
+                    del self._active_by_key[key]
+
+    def cancel(self, job_id):
+        """Kuyruktaki veya çalışan işi iptal eder; iptal edildiyse True döndürür."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] not in ("queued", "running"):
+                return False
+            job.update(status="cancelled", finished_at=time.time())
+            for key in [k for k, active in self._active_by_key.items() if active == job_id]:
+                del self._active_by_key[key] # Aynı video yeniden istenirse yeni iş açılır
+            process = self._processes.get(job_id)
+            future = self._futures.get(job_id)
+        if future:
+            future.cancel()
+        if process:
+            process.terminate()
+        logger.info(f"{self.name}: Cancelled video job {job_id}")
+        return True
+
+    def status(self, job_id=None):
+        """Tek bir işin (veya job_id verilmezse tüm işlerin) durum kopyasını döndürür."""
+        with self._lock:
+            if job_id is not None:
+                job = self._jobs.get(job_id)
+                return dict(job) if job else None
+            return [dict(job) for job in self._jobs.values()]
+
+    def wait(self, job_ids=None, timeout=None):
+        """Verilen (veya tüm) işler bitene kadar bekler ve son durumlarını döndürür."""
+        with self._lock:
+            job_ids = job_ids or list(self._jobs)
+            futures = [self._futures[j] for j in job_ids if j in self._futures]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                pass # Hata zaten iş durumuna yazıldı, iş iptal edildi veya zaman aşımı
+        return [self.status(j) for j in job_ids]
+
+    def shutdown(self, wait=True):
+        if not wait:
+            for job in self.status():
+                self.cancel(job["job_id"])
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def execute(self, task=None):
+        """
+        task["async"] verilirse {"job_id"} döndürür; aksi halde render bitene kadar bekler ve
+        eski davranıştaki gibi [dosya yolu] (hata durumunda hata mesajı) döndürür.
+        """
+        prompt, duration, _ = self._normalize(task)
+        logger.info(f"{self.name}: Generating video for '{prompt}' with duration {duration}s")
+        job_id = self.submit(task)
+        if task and task.get("async"):
+            return {"job_id": job_id}
+        job = self.wait([job_id])[0]
+        if job["status"] == "done":
+            return [job["result"]]
+        if job["error"] == "FFmpeg not installed":
+            return ["Error: FFmpeg not installed"]
+        return ["Error: Video generation failed"]
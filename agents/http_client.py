@@ -0,0 +1,75 @@
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Tüm dış HTTP çağrıları (web kazıma, metin arama, Mistral API) bu modüldeki tek
+# bir requests.Session üzerinden yapılır. Böylece aynı host'a giden istekler
+# keep-alive bağlantıları yeniden kullanır ve her çağrıda TCP/TLS kurulumu tekrarlanmaz.
+DEFAULT_USER_AGENT = 'Mozilla/5.0'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_connections=None, pool_maxsize=None, max_retries=None, backoff_factor=None,
+                   retry_reads=True) -> requests.Session:
+    """
+    Havuzlu ve yeniden denemeli yeni bir oturum oluşturur. Verilmeyen ayarlar ortam değişkenlerinden okunur.
+    Yanıt okuma ve durum koduna göre yeniden denemeler yalnızca idempotent metotlara uygulanır;
+    retry_reads=False ise bunlar tamamen kapatılır ve yalnızca bağlantı kurulamadığında
+    (istek henüz gönderilmemişken) yeniden denenir.
+    """
+    if pool_connections is None:
+        pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))  # Host başına havuz sayısı
+    if pool_maxsize is None:
+        pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))  # Havuz başına açık bağlantı
+    if max_retries is None:
+        max_retries = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    if backoff_factor is None:
+        backoff_factor = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries if retry_reads else 0,
+        status=max_retries if retry_reads else 0,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # POST yeniden gönderilmez: ücretli, idempotent olmayan çağrılar iki kez işlenebilir
+        allowed_methods=frozenset(["HEAD", "GET", "OPTIONS"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'User-Agent': DEFAULT_USER_AGENT})
+    logger.info(f"HTTP session created (pool_connections={pool_connections}, pool_maxsize={pool_maxsize}, "
+                f"max_retries={max_retries}, backoff_factor={backoff_factor}, retry_reads={retry_reads})")
+    return session
+
+
+def get_session() -> requests.Session:
+    """Süreç genelinde paylaşılan, bağlantı havuzlu HTTP oturumunu döndürür."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Paylaşılan oturumu ve açık bağlantılarını kapatır (kapanışta veya testlerde)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
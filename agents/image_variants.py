@@ -0,0 +1,192 @@
+import io
+import os
+import re
+import json
+import html
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from agents.blob_store import get_blob_store
+from agents.static_files import FINGERPRINT_PATTERN
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow yoksa görseller olduğu gibi (tek boyutta) yayınlanır
+    Image = None
+    features = None
+
+logger = logging.getLogger(__name__)
+
+RASTER_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_ATTR = re.compile(r"""([\w-]+)\s*=\s*("([^"]*)"|'([^']*)')""")
+_MAX_WIDTH_STYLE = re.compile(r"max-width\s*:\s*(\d+)px")
+
+
+def _encode_variant(source_path, width, fmt, quality):
+    """Kaynağı width genişliğine küçültüp fmt (webp/avif) olarak kodlar; worker süreçlerinde çalışır."""
+    with Image.open(source_path) as img:
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+        height = max(1, round(img.height * width / img.width))
+        if width != img.width:
+            img = img.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt.upper(), quality=quality)
+        return buffer.getvalue()
+
+
+class ResponsiveImages:
+    """
+    Yayın sırasında görsel varyantları üretir. Sayfadaki yerel <img> etiketleri için kaynak
+    görselin birkaç genişlikte WebP (destekleniyorsa AVIF) kopyası bir süreç havuzunda kodlanır,
+    blob deposuna eklenir ve site klasörüne bağlanır. Etiket srcset/sizes ile <picture> içine
+    alınır ve width/height eklenir. Varyantlar kaynak özetiyle indekslenir; aynı görsel ikinci
+    kez kodlanmaz.
+    """
+
+    def __init__(self, widths=None, quality=None, max_workers=None):
+        self.widths = widths or [int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,960,1280").split(",")]
+        self.quality = quality or int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+        self.max_workers = max_workers or int(os.getenv("IMAGE_VARIANT_WORKERS", str(os.cpu_count() or 4)))
+        self.formats = []
+        if Image is not None:
+            self.formats = [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+        self._index_path = os.path.join(get_blob_store().root, "variants.json")
+        self._index = self._load_index()  # kaynak özeti -> {"width", "height", "variants": {"webp:640": blob özeti}}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        with self._lock:
+            snapshot = json.dumps(self._index)
+        tmp_path = f"{self._index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self._index_path)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+    @staticmethod
+    def _variant_name(file_name, source_digest, width, fmt):
+        # "banner.<özet>.jpg" -> "banner-640w.<kaynak özeti>.webp": içerik kaynaktan türediği için ad parmak izlidir
+        stem = FINGERPRINT_PATTERN.sub("", file_name)
+        stem = os.path.splitext(stem)[0] if stem == file_name else stem
+        return f"{stem}-{width}w.{source_digest[:12]}.{fmt}"
+
+    def _prepare(self, site_folder, sources):
+        """Kaynakların indeks kayıtlarını hazırlar, eksik varyantları kodlar ve site klasörüne bağlar."""
+        store = get_blob_store()
+        prepared, jobs = {}, []
+        for src in sources:
+            source_path = os.path.join(site_folder, src)
+            try:
+                digest, _ = store.put_file(source_path)
+                with self._lock:
+                    entry = self._index.get(digest)
+                if entry is None:
+                    with Image.open(source_path) as img:
+                        entry = {"width": img.width, "height": img.height, "variants": {}}
+                    with self._lock:
+                        self._index[digest] = entry
+            except Exception as e:
+                logger.warning(f"Skipping responsive variants for {source_path}: {e}")
+                continue
+            widths = sorted({w for w in self.widths if w < entry["width"]} | {entry["width"]})
+            prepared[src] = (digest, entry, widths)
+            for fmt in self.formats:
+                for width in widths:
+                    blob_digest = entry["variants"].get(f"{fmt}:{width}")
+                    if blob_digest is None or not os.path.exists(store.path_for(blob_digest, f".{fmt}")):
+                        jobs.append((src, source_path, width, fmt))
+
+        if jobs:
+            pool = self._get_pool()
+            futures = [(job, pool.submit(_encode_variant, job[1], job[2], job[3], self.quality)) for job in jobs]
+            for (src, _, width, fmt), future in futures:
+                try:
+                    blob_digest, _ = store.put_bytes(future.result(), f".{fmt}")
+                except Exception as e:
+                    logger.warning(f"Could not encode {fmt} variant {width}w of {src}: {e}")
+                    continue
+                with self._lock:
+                    prepared[src][1]["variants"][f"{fmt}:{width}"] = blob_digest
+            self._save_index()
+            logger.info(f"Encoded {len(jobs)} image variant(s) for {site_folder}.")
+
+        for src, (digest, entry, widths) in prepared.items():
+            for fmt in self.formats:
+                for width in widths:
+                    blob_digest = entry["variants"].get(f"{fmt}:{width}")
+                    if blob_digest:
+                        store.link(store.path_for(blob_digest, f".{fmt}"),
+                                   os.path.join(site_folder, self._variant_name(src, digest, width, fmt)))
+        return prepared
+
+    def _picture(self, tag, attrs, src, digest, entry, widths):
+        style = attrs.get("style", "")
+        max_width = _MAX_WIDTH_STYLE.search(style)
+        sizes = f"(max-width: {max_width.group(1)}px) 100vw, {max_width.group(1)}px" if max_width else "100vw"
+        sources = []
+        for fmt in self.formats:
+            srcset = ", ".join(f"{html.escape(self._variant_name(src, digest, w, fmt))} {w}w" for w in widths
+                               if f"{fmt}:{w}" in entry["variants"])
+            if srcset:
+                sources.append(f'<source type="image/{fmt}" srcset="{srcset}" sizes="{sizes}">')
+        extra = ""
+        if "width" not in attrs and "height" not in attrs:
+            extra += f' width="{entry["width"]}" height="{entry["height"]}"'
+        if "loading" not in attrs:
+            extra += ' loading="lazy" decoding="async"'
+        img_tag = tag[:-2].rstrip() + extra + ">" if tag.endswith("/>") else tag[:-1] + extra + ">"
+        if not sources:
+            return img_tag
+        return "<picture>" + "".join(sources) + img_tag + "</picture>"
+
+    def rewrite_html(self, html_fragment, site_folder):
+        """
+        HTML parçasındaki yerel raster <img> etiketlerini duyarlı işaretlemeyle değiştirir.
+        Dış bağlantılı veya site klasöründe bulunmayan görseller olduğu gibi kalır.
+        """
+        if Image is None or not html_fragment:
+            return html_fragment
+        tags = {}
+        for match in _IMG_TAG.finditer(html_fragment):
+            attrs = {m.group(1).lower(): html.unescape(m.group(3) if m.group(3) is not None else m.group(4))
+                     for m in _ATTR.finditer(match.group(0))}
+            src = attrs.get("src", "")
+            if ("/" in src or "\\" in src or ":" in src
+                    or os.path.splitext(src)[1].lower() not in RASTER_EXTENSIONS
+                    or not os.path.isfile(os.path.join(site_folder, src))):
+                continue
+            tags[match.group(0)] = (attrs, src)
+        if not tags:
+            return html_fragment
+
+        prepared = self._prepare(site_folder, {src for _, src in tags.values()})
+
+        def replace(match):
+            tag = match.group(0)
+            if tag not in tags or tags[tag][1] not in prepared:
+                return tag
+            attrs, src = tags[tag]
+            return self._picture(tag, attrs, src, *prepared[src])
+
+        return _IMG_TAG.sub(replace, html_fragment)
@@ -8,16 +8,24 @@ from agents.backend_agent import BackendAgent
 from agents.editor_agent import EditorAgent
 from agents.reviewer_agent import ReviewerAgent
 from agents.server_agent import ServerAgent
+from agents.provider_router import generate_content_stream
+from agents.build_queue import BuildQueue
+from agents.site_scheduler import SiteScheduler
+from agents.site_registry import SiteRegistry
+from agents.site_releases import SiteReleases
+from agents.static_files import precompress_file, prune_unreferenced, fingerprinted_name, name_for_digest
+from agents.blob_store import get_blob_store
+from agents.image_variants import ResponsiveImages
 # from agents.helper_agents.image_generator_agent import ImageGeneratorAgent # main.py'de import ediliyor, burada gerek yok
 # from agents.helper_agents.video_generator_agent import VideoGeneratorAgent
 
 import os
-import schedule
 import time
-from threading import Thread
-import shutil # Görsel kopyalamak için eklendi
-from bs4 import BeautifulSoup # HTML manipülasyonu için eklendi
+import threading
+from threading import Lock
 import re # Gerekirse diye duruyor ama BeautifulSoup tercih edilecek
+import copy
+import html
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -28,12 +36,22 @@ class ManagerAgent(BaseAgent):
         super().__init__(name)
         self.agents = {}
         self.registered_sites = {} # Site bilgilerini (klasör, URL, kullanıcı içeriği) saklar
-        self.running_servers = {} # site_topic -> ServerAgent instance
-        self.scheduler_thread = None
-        self.should_run_scheduler = True # Adını değiştirdim daha anlaşılır olması için
+        self.server_agent = None # Tüm siteleri tek portta sunan paylaşılan sunucu (ilk kullanımda başlar)
+        # Periyodik içerik güncellemeleri; işler worker havuzunda çalışır, zamanlayıcı thread'i bloklanmaz
+        self.scheduler = SiteScheduler()
+        self.build_queue = None # Çoklu site oluşturma kuyruğu, ilk kullanımda oluşturulur
+        self._server_lock = Lock()
+        # Site spec'leri, build manifest'leri, portlar ve build zamanları yeniden başlatmalarda korunur
+        self.registry = SiteRegistry()
+        # Build'ler sürümlü klasörlere yazılır ve canlı site yoluna atomik olarak bağlanır
+        self.releases = SiteReleases()
+        # Yerel görseller için yayın sırasında genişlik/format varyantları (srcset) üretilir
+        self.image_pipeline = ResponsiveImages()
 
     def add_agent(self, agent):
         self.agents[agent.name] = agent
+        if isinstance(agent, ServerAgent):
+            self.server_agent = agent
         logger.info(f"{agent.name} added to the system.")
 
     def _copy_local_assets(self, source_assets_list, site_folder):
@@ -47,13 +65,17 @@ class ManagerAgent(BaseAgent):
             source_asset_path = asset_file_name 
             
             # Güvenlik için: Path traversal saldırılarını önlemek adına basename kullanıyoruz.
-            base_name = os.path.basename(asset_file_name)
-            destination_asset_path = os.path.join(site_folder, base_name)
+            # Dosya adına içerik özeti eklenir (parmak izi); sunucu bu adları immutable olarak sunar.
+            destination_asset_path = None
             
             try:
                 if os.path.exists(source_asset_path):
-                    shutil.copy(source_asset_path, destination_asset_path)
-                    logger.info(f"Copied asset {source_asset_path} to {destination_asset_path}")
+                    # Görsel paylaşımlı blob deposuna bir kez eklenir, site klasörüne hardlink ile bağlanır
+                    digest, blob_path = get_blob_store().put_file(source_asset_path)
+                    base_name = name_for_digest(asset_file_name, digest)
+                    destination_asset_path = os.path.join(site_folder, base_name)
+                    get_blob_store().link(blob_path, destination_asset_path)
+                    logger.info(f"Linked asset {source_asset_path} to {destination_asset_path}")
                     copied_asset_paths.append(base_name) # Sadece dosya adını döndür (HTML'de kullanılacak)
                 else:
                     logger.warning(f"Source asset {source_asset_path} not found. Cannot copy.")
@@ -62,126 +84,212 @@ class ManagerAgent(BaseAgent):
         return copied_asset_paths
 
 
-    def create_website(self, site_topic, user_content_spec=None):
+    def _render_sections_html(self, sections):
+        """Bölümleri (<h2> başlık + <div> içerik) tek bir HTML parçasında birleştirir."""
+        # HTML içeriği doğrudan eklenir (EditorAgent'tan geldiği için güvenli varsayılıyor)
+        # Gerçekte XSS önlemleri için sanitization gerekebilir.
+        return "\n".join(
+            f"<h2>{html.escape(section.get('title', 'Bölüm'))}</h2>\n<div>{section.get('content', '')}</div>"
+            for section in sections)
+
+    def _publish_asset(self, site_folder, name, content):
+        """
+        content'i parmak izli adla (ör. "style.<özet>.css") site klasörüne yazar ve bu adı döndürür.
+        Aynı içerik daha önce yayınlandıysa dosya yeniden yazılmaz.
+        """
+        published_name = fingerprinted_name(name, content.encode("utf-8"))
+        published_path = os.path.join(site_folder, published_name)
+        if not os.path.exists(published_path):
+            self._write_atomic(published_path, content)
+            precompress_file(published_path)
+        return published_name
+
+    def _render_page(self, design_agent, site_topic, theme, processed_content, banner_images, site_folder):
+        """
+        Sayfanın tüm slotlarını hazırlayıp DesignAgent şablonuyla işler; {"html", "css"} döndürür.
+        Temanın CSS'i önce parmak izli adla yayınlanır ve sayfa bu ada bağlanır.
+        """
+        stylesheet = self._publish_asset(site_folder, "style.css", design_agent.get_css(theme))
+        # Bölümlerin yerel görselleri (EditorAgent'ın blob deposuna indirdikleri) sürüme bağlanır
+        for section in processed_content.get("sections", []):
+            for asset_name, blob_path in (section.get("assets") or {}).items():
+                if os.path.exists(blob_path):
+                    get_blob_store().link(blob_path, os.path.join(site_folder, asset_name))
+                else:
+                    logger.warning(f"Asset {asset_name} is missing from the blob store ({blob_path}).")
+        banner_html = "".join(
+            f'<img src="{html.escape(img_name)}" alt="{html.escape(site_topic)} görseli" '
+            f'style="max-width: 600px; margin: 10px auto; display: block;">'
+            for img_name in banner_images)
+
+        # 5. Dynamic Agent: JavaScript ekler
+        scripts_html = ""
+        dynamic_agent = self.agents.get("Dynamic Agent")
+        if dynamic_agent:
+            dynamic_result = dynamic_agent.execute({}) # Şu an için task almıyor
+            logger.info("Dynamic Agent completed.")
+            if dynamic_result.get("javascript"):
+                scripts_html = f"<script>{dynamic_result['javascript']}</script>"
+        else:
+            logger.warning("Dynamic Agent not found.")
+
+        return design_agent.render_page(
+            theme=theme,
+            title=processed_content.get("page_title", site_topic),
+            main_heading=processed_content.get("main_heading", site_topic),
+            content=self.image_pipeline.rewrite_html(
+                self._render_sections_html(processed_content.get("sections", [])), site_folder),
+            banner=self.image_pipeline.rewrite_html(banner_html, site_folder),
+            footer=f"{site_topic.capitalize()} {time.strftime('%Y')}",
+            scripts=scripts_html,
+            stylesheet=stylesheet,
+        )
+
+    def _write_atomic(self, path, content):
+        """Dosyayı geçici bir dosyaya yazıp os.replace ile yerine koyar; okuyucular yarım dosya görmez."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _load_manifest(self, site_topic):
+        """Sitenin son build manifest'ini kayıttan okur (yoksa boş manifest)."""
+        return self.registry.get_manifest(site_topic) or {"order": [], "sections": {}}
+
+    def _build_manifest(self, processed_content):
+        """
+        EditorAgent çıktısından manifest oluşturur: bölüm sırası (spec özetleri) ve her
+        özet için başlık, HTML parçası ve kaynak özeti. Hatalı bölümler saklanmaz ki
+        bir sonraki güncellemede yeniden denensin.
+        """
+        manifest = {"page_title": processed_content.get("page_title"),
+                    "main_heading": processed_content.get("main_heading"),
+                    "order": [], "sections": {}}
+        for section in processed_content.get("sections", []):
+            spec_hash = section.get("spec_hash")
+            manifest["order"].append(spec_hash)
+            if spec_hash and not section.get("failed") and not section.get("content", "").startswith("Error"):
+                manifest["sections"][spec_hash] = {"title": section["title"], "content": section["content"],
+                                                   "source_hash": section.get("source_hash"),
+                                                   "assets": section.get("assets", {})}
+        return manifest
+
+    def _save_manifest(self, site_topic, manifest):
+        self.registry.upsert_site(site_topic, manifest=manifest, last_build_at=time.time())
+
+    def restore_sites(self):
+        """
+        Kayıttaki siteleri yeniden oluşturmadan geri yükler: çıktısı diskte duran her site
+        için site paylaşılan sunucuya eklenir ve registered_sites doldurulur.
+        Geri yüklenen site adlarını döndürür.
+        """
+        restored = []
+        for site in self.registry.list_sites():
+            site_topic = site["topic"]
+            if site_topic in self.registered_sites:
+                continue
+            if not site.get("folder") or not os.path.isfile(os.path.join(site["folder"], "index.html")):
+                logger.warning(f"Output for registered site {site_topic} is missing, it will need a rebuild.")
+                continue
+
+            server_agent_instance = self._get_server_agent()
+            # create_website ile aynı yönlendirme: Host başlığı eşlemeleri de geri yüklenir
+            server_result = server_agent_instance.execute({"site_folder": site["folder"],
+                                                           "hosts": (site.get("spec") or {}).get("domains", [])})
+            if not server_result.get("success"):
+                logger.error(f"Could not serve restored site {site_topic}: {server_result.get('message')}")
+                server_agent_instance = None
+
+            self.registered_sites[site_topic] = {
+                "folder": site["folder"],
+                "url": server_result.get("url"),
+                "user_content_spec": site.get("spec"),
+                "server_agent_instance": server_agent_instance,
+                "site_id": server_result.get("site_id"),
+                "port": server_agent_instance.port if server_agent_instance else None,
+                "banner_images": site.get("banner_images") or [],
+            }
+            restored.append(site_topic)
+        logger.info(f"Restored {len(restored)} site(s) from registry without rebuilding.")
+        return restored
+
+    def _get_server_agent(self):
+        """Paylaşılan çok siteli sunucuyu döndürür; eklenmemişse oluşturur (SERVER_PORT, varsayılan 8000)."""
+        with self._server_lock:
+            if self.server_agent is None:
+                self.server_agent = ServerAgent()
+            return self.server_agent
+
+    def stop_server(self):
+        """Paylaşılan sunucuyu tamamen durdurur (uygulama kapanışında)."""
+        if self.server_agent:
+            self.server_agent.stop_server()
+
+    def create_website(self, site_topic, user_content_spec=None, progress_callback=None):
+        """
+        Siteyi oluşturur ve sunar. Başarılıysa registered_sites kaydını, aksi halde None döndürür.
+        progress_callback(stage, fraction) verilirse her aşamada çağrılır (BuildQueue için).
+        """
+        def report(stage, fraction):
+            if progress_callback:
+                progress_callback(stage, fraction)
+
         logger.info(f"Creating new website: {site_topic}")
+        report("design", 0.0)
         site_folder_name = site_topic.lower().replace(' ', '_').replace('[^\w\s-]', '') # Basit normalleştirme
-        site_folder_path = f"output/sites/{site_folder_name}"
-        os.makedirs(site_folder_path, exist_ok=True)
+        site_folder_path = f"output/sites/{site_folder_name}" # Canlı yol: yayınlanan sürüme sembolik bağ
 
-        # 1. Design Agent: Temel HTML ve CSS yapısını oluşturur
-        design_task = {"topic": site_topic}
-        if user_content_spec and user_content_spec.get("theme"):
-            design_task["theme"] = user_content_spec["theme"]
-        
+        # 1. Design Agent: Tema şablonunu sağlar (spec'teki "theme" ile seçilir)
+        theme = (user_content_spec or {}).get("theme")
         design_agent = self.agents.get("Design Agent")
         if not design_agent:
             logger.error("Design Agent not found!")
             return
-        design_result = design_agent.execute(design_task)
-        logger.info("Design Agent completed.")
-
-        # HTML ve CSS dosyalarını yaz
-        index_html_path = os.path.join(site_folder_path, "index.html")
-        style_css_path = os.path.join(site_folder_path, "style.css")
-        with open(index_html_path, "w", encoding='utf-8') as f:
-            f.write(design_result["html"])
-        with open(style_css_path, "w", encoding='utf-8') as f:
-            f.write(design_result["css"])
 
         # 2. Editor Agent: İçeriği üretir
+        report("content", 0.1)
         editor_agent = self.agents.get("Editor Agent")
         if not editor_agent:
             logger.error("Editor Agent not found!")
             return
 
-        # EditorAgent'a hem site konusunu hem de kullanıcıdan gelen detaylı içeriği verelim
-        content_task = {"topic": site_topic, "user_content": user_content_spec}
+        # EditorAgent'a hem site konusunu hem de kullanıcıdan gelen detaylı içeriği verelim.
+        # Önceki build'in manifest'i verilirse değişmeyen bölümler yeniden üretilmez.
+        previous_manifest = self._load_manifest(site_topic)
+        content_task = {"topic": site_topic, "user_content": user_content_spec,
+                        "manifest": previous_manifest["sections"]}
         processed_content = editor_agent.execute(content_task)
         logger.info("Editor Agent completed.")
 
-        # 3. HTML'i BeautifulSoup ile güncelle (içerik, başlık vb.)
+        # 3. Sayfayı şablon slotlarını doldurarak tek seferde oluştur (başlık, içerik, banner, JS)
+        report("assemble", 0.6)
+        # Tüm dosyalar yeni bir sürüm klasörüne yazılır; canlı site yayın anına kadar değişmez
+        staging_dir = self.releases.stage(site_folder_name)
         try:
-            with open(index_html_path, "r", encoding='utf-8') as f:
-                html_doc = f.read()
-            
-            soup = BeautifulSoup(html_doc, 'html.parser')
-
-            # Sayfa başlığını (<title>) güncelle
-            if soup.title:
-                soup.title.string = processed_content.get("page_title", site_topic)
-            else:
-                new_title_tag = soup.new_tag("title")
-                new_title_tag.string = processed_content.get("page_title", site_topic)
-                if soup.head:
-                    soup.head.append(new_title_tag)
-
-
-            # Ana başlığı (<h1>) güncelle
-            h1_tag = soup.find('h1')
-            if h1_tag:
-                h1_tag.string = processed_content.get("main_heading", site_topic)
-            
-            # İçerik bölümlerini ekle
-            content_section_tag = soup.find('section', id='content')
-            if content_section_tag:
-                content_section_tag.clear() # Mevcut placeholder içeriği temizle
-                for section in processed_content.get("sections", []):
-                    section_title_tag = soup.new_tag('h2')
-                    section_title_tag.string = section.get("title", "Bölüm")
-                    content_section_tag.append(section_title_tag)
-                    
-                    # HTML içeriğini doğrudan ekle (EditorAgent'tan geldiği için güvenli varsayılıyor)
-                    # Gerçekte XSS önlemleri için sanitization gerekebilir.
-                    section_content_div = soup.new_tag('div')
-                    section_content_div.append(BeautifulSoup(section.get("content", ""), 'html.parser'))
-                    content_section_tag.append(section_content_div)
-            else:
-                logger.warning("Could not find <section id='content'> in the HTML template.")
-
-            # 4. Yerel "banner" görsellerini kopyala ve HTML'e ekle
+            # 4. Yerel "banner" görsellerini kopyala
             copied_banner_images = []
             if processed_content.get("banner_images"):
-                copied_banner_images = self._copy_local_assets(processed_content["banner_images"], site_folder_path)
-
-            banner_section_tag = soup.find('section', id='banner-image-section')
-            if banner_section_tag:
-                banner_section_tag.clear()
-                for img_name in copied_banner_images:
-                    img_tag = soup.new_tag('img', src=img_name, alt=f"{site_topic} görseli")
-                    img_tag['style'] = "max-width: 600px; margin: 10px auto; display: block;"
-                    banner_section_tag.append(img_tag)
-            elif copied_banner_images: # Eğer banner bölümü yoksa ama resim varsa body'e ekle
-                 logger.warning("Banner section not found, appending images to body.")
-                 for img_name in copied_banner_images:
-                    img_tag = soup.new_tag('img', src=img_name, alt=f"{site_topic} görseli")
-                    img_tag['style'] = "max-width: 500px;"
-                    if soup.body:
-                        soup.body.append(img_tag)
-
-
-            # 5. Dynamic Agent: JavaScript ekler
-            dynamic_agent = self.agents.get("Dynamic Agent")
-            if dynamic_agent:
-                dynamic_result = dynamic_agent.execute({}) # Şu an için task almıyor
-                logger.info("Dynamic Agent completed.")
-                if dynamic_result.get("javascript"):
-                    script_tag = soup.new_tag('script')
-                    script_tag.string = dynamic_result["javascript"]
-                    if soup.body: # body'nin sonuna ekle
-                        soup.body.append(script_tag)
-                    else: # body yoksa head'e ekle (ideal değil ama fallback)
-                         if soup.head: soup.head.append(script_tag)
-            else:
-                logger.warning("Dynamic Agent not found.")
-
-            # Güncellenmiş HTML'i dosyaya yaz
-            with open(index_html_path, "w", encoding='utf-8') as f:
-                f.write(str(soup))
-            logger.info(f"HTML content updated and saved to {index_html_path}")
+                copied_banner_images = self._copy_local_assets(processed_content["banner_images"], staging_dir)
+
+            page = self._render_page(design_agent, site_topic, theme, processed_content, copied_banner_images,
+                                     staging_dir)
+            logger.info("Design Agent completed.")
+
+            # HTML'i tek seferde, atomik olarak yaz (CSS _render_page içinde parmak izli adla yayınlandı)
+            index_html_path = os.path.join(staging_dir, "index.html")
+            self._write_atomic(index_html_path, page["html"])
+            # gzip/brotli varyantları yayın sırasında bir kez üretilir; sunucu istek başına sıkıştırmaz
+            precompress_file(index_html_path)
+            manifest = self._build_manifest(processed_content)
+            version = self.releases.publish(site_folder_name, staging_dir, site_folder_path, manifest=manifest)
+            self.registry.upsert_site(site_topic, folder=site_folder_path, spec=user_content_spec,
+                                      banner_images=copied_banner_images,
+                                      manifest=manifest, last_build_at=time.time())
+            logger.info(f"HTML content assembled and published to {site_folder_path} (version {version})")
 
         except Exception as e:
             logger.error(f"Error during HTML content processing or file writing: {e}", exc_info=True)
-            # Hata durumunda devam etmeyebiliriz.
+            self.releases.discard(staging_dir) # Yayınlanmamış yarım sürüm silinir, canlı site etkilenmez
             return
 
         # 6. Backend Agent (simülasyon)
@@ -193,9 +301,12 @@ class ManagerAgent(BaseAgent):
             logger.warning("Backend Agent not found.")
 
         # 7. Reviewer Agent
+        report("review", 0.8)
         reviewer_agent = self.agents.get("Reviewer Agent")
         if reviewer_agent:
-            review_result = reviewer_agent.execute({"site_folder": site_folder_path})
+            # Reviewer diskten tekrar okumak yerine bellekteki HTML ve CSS'i kullanır
+            review_result = reviewer_agent.execute({"site_folder": site_folder_path, "html_content": page["html"],
+                                                    "css_content": page["css"]})
             logger.info(f"Reviewer Agent completed: {review_result}")
             if review_result.get("errors"):
                 logger.warning(f"Reviewer Agent found errors: {review_result['errors']}. Server will still be started.")
@@ -203,55 +314,24 @@ class ManagerAgent(BaseAgent):
         else:
             logger.warning("Reviewer Agent not found.")
 
-        # 8. Server Agent: Siteyi sunar
-        server_agent = self.agents.get("Server Agent") # Server agent genellikle tek bir instance olur.
-                                                       # Eğer her site için ayrı server agent gerekiyorsa,
-                                                       # main.py'de her create_website için yeni bir tane oluşturulmalı.
-                                                       # Şu anki yapıda tek server_agent var, bu sorun olabilir.
-                                                       # Çözüm: Her site için yeni bir ServerAgent instance'ı oluşturmak veya
-                                                       # ServerAgent'ı birden fazla siteyi yönetebilecek şekilde tasarlamak.
-                                                       # Şimdilik, var olanı kullanmaya çalışalım ama bu potansiyel bir sorundur.
-                                                       # YA DA ServerAgent'ı her çağrıda yeni bir portta başlatacak şekilde ayarlamak.
-                                                       # Basitlik adına, her site için ayrı bir ServerAgent instance'ı daha iyi olurdu.
-                                                       # Bu düzeltme main.py tarafında yapılmalı.
-                                                       # Şimdilik var olanı kullanıyoruz:
-
-        if "Server Agent" not in self.agents:
-             logger.error("Server Agent definition not found in manager.agents. Cannot start server.")
-             return
-
-        # Her site için farklı bir portta yeni bir sunucu başlatalım.
-        # Basit port yönetimi:
-        current_port = 8000 + len(self.running_servers) # Her yeni site için portu artır
-        
-        # Yeni bir ServerAgent instance'ı oluşturalım (eğer her site kendi sunucusunu alacaksa)
-        # VEYA mevcut ServerAgent'ın portunu ve site klasörünü değiştirelim (bu thread-safe olmayabilir)
-        # En temizi: Her site için yeni ServerAgent. Bu manager'ın server agent'ını kullanmak yerine
-        # yeni bir tane oluşturup yönetmek anlamına gelir.
-        # Şimdilik, Manager'daki tek ServerAgent'ın execute'unu çağırıyoruz, bu da onun iç portunu kullanır.
-        # Bu, birden fazla site aynı anda çalıştırılırsa sorun yaratır.
-        # Doğru yaklaşım: Her site için ayrı bir ServerAgent instance'ı.
-        # Manager'ın içindeki self.agents["Server Agent"] genel bir şablon gibi düşünülmeli.
-        
-        # GEÇİCİ ÇÖZÜM: Her site için yeni bir ServerAgent oluşturalım (main.py'de tanımlanan genel yerine)
-        # Bu, ManagerAgent'ın iç yapısını biraz değiştirir. Ya da ServerAgent.execute'u port alacak şekilde güncelleriz.
-        # ServerAgent'ın portu __init__ ile ayarlanıyor. Bu yüzden her site için yeni instance en mantıklısı.
-        
-        # Eğer her site için ayrı bir sunucu isteniyorsa:
-        temp_server_agent = ServerAgent(name=f"Server for {site_topic}", port=current_port) # Yeni instance, yeni port
-        server_result = temp_server_agent.execute({"site_folder": site_folder_path})
-
+        # 8. Server Agent: Siteyi paylaşılan çok siteli sunucuya ekler (yeniden build'de yalnızca yönlendirme güncellenir)
+        report("serve", 0.9)
+        server_agent_instance = self._get_server_agent()
+        server_result = server_agent_instance.execute({"site_folder": site_folder_path, "site_id": site_folder_name,
+                                                       "hosts": (user_content_spec or {}).get("domains", [])})
 
         if server_result.get("success"):
-            logger.info(f"Server for {site_topic} started. Website URL: {server_result['url']}")
+            logger.info(f"Website {site_topic} is being served. Website URL: {server_result['url']}")
             self.registered_sites[site_topic] = {
                 "folder": site_folder_path, 
                 "url": server_result['url'],
                 "user_content_spec": user_content_spec, # Gelecekteki güncellemeler için sakla
-                "server_agent_instance": temp_server_agent, # Sunucuyu durdurmak için
-                "port": current_port
+                "server_agent_instance": server_agent_instance, # Siteyi sunucudan kaldırmak için
+                "site_id": server_result["site_id"],
+                "port": server_agent_instance.port,
+                "banner_images": copied_banner_images, # Güncellemelerde sayfa yeniden oluşturulurken kullanılır
             }
-            # self.running_servers[site_topic] = temp_server_agent # Bu satır üstteki server_agent_instance ile aynı
+            self.registry.upsert_site(site_topic, url=server_result['url'], port=server_agent_instance.port)
             
             # İçerik güncelleme planlaması (isteğe bağlı)
             # self.schedule_content_update(site_topic, schedule_type="daily", time_str="23:55")
@@ -259,8 +339,77 @@ class ManagerAgent(BaseAgent):
             logger.error(f"Server Agent failed to start for {site_topic}: {server_result.get('message')}")
 
         # Saklanan orijinal kullanıcı içeriği
-        self.registered_sites[site_topic]["user_content_spec"] = user_content_spec
+        if site_topic in self.registered_sites:
+            self.registered_sites[site_topic]["user_content_spec"] = user_content_spec
+        return self.registered_sites.get(site_topic)
+
+    def _get_build_queue(self):
+        """Build kuyruğunu döndürür; ilk kullanımda oluşturulur (eşzamanlı submit'lerde tek kuyruk)."""
+        with self._server_lock:
+            if self.build_queue is None:
+                self.build_queue = BuildQueue()
+            return self.build_queue
+
+    def submit_website(self, site_topic, user_content_spec=None):
+        """create_website'ı build kuyruğuna ekler ve job_id döndürür (beklemez)."""
+        return self._get_build_queue().submit(
+            site_topic,
+            lambda progress_callback: self.create_website(site_topic, user_content_spec, progress_callback))
+
+    def get_build_status(self, job_id=None):
+        if self.build_queue is None:
+            return None if job_id else []
+        return self.build_queue.status(job_id)
+
+
+    def stream_section_html(self, section_info, topic):
+        """
+        Tek bir bölümün HTML'ini parça parça üretir. 'ai' kaynaklı metin bölümlerinde
+        sağlayıcıdan gelen token'lar geldikçe aktarılır; önizleme ilk token'la başlar.
+        Diğer bölüm türleri EditorAgent ile işlenip tek parça halinde gönderilir.
+        """
+        section_title = section_info.get("title", "Bölüm")
+        yield f"<h2>{html.escape(section_title)}</h2>\n<div>"
 
+        editor_agent = self.agents.get("Editor Agent")
+        if section_info.get("type", "text") == "text" and section_info.get("source") == "ai" and editor_agent:
+            prompt, purpose = editor_agent._ai_prompt(section_info, topic)
+            for chunk in generate_content_stream(prompt, purpose):
+                yield html.escape(chunk)
+        elif editor_agent:
+            yield editor_agent._process_section(section_info, topic)["content"]
+        else:
+            logger.error("Editor Agent not found! Cannot render section.")
+        yield "</div>\n"
+
+    def stream_sections_html(self, site_topic, user_content_spec):
+        """Spec'teki tüm bölümleri sırayla stream_section_html ile akıtır (önizleme için)."""
+        for section_info in (user_content_spec or {}).get("sections", []):
+            yield from self.stream_section_html(section_info, site_topic)
+
+    def _stream_preview_page(self, site_topic, user_content_spec):
+        """Önizleme sayfası: tema stili ve başlık hemen, bölümler üretildikçe gönderilir."""
+        spec = user_content_spec or {}
+        design_agent = self.agents.get("Design Agent")
+        css = design_agent.get_css(spec.get("theme")) if design_agent else ""
+        yield (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+               f"<title>{html.escape(spec.get('title', site_topic))} (önizleme)</title>"
+               f"<style>{css}</style></head><body>\n"
+               f"<h1>{html.escape(spec.get('main_heading', spec.get('title', site_topic)))}</h1>\n")
+        yield from self.stream_sections_html(site_topic, spec)
+        yield "</body></html>\n"
+
+    def preview_website(self, site_topic, user_content_spec=None):
+        """
+        Siteyi build etmeden canlı önizleme olarak yayınlar ve önizleme URL'ini döndürür.
+        Her ziyarette sayfa yeniden üretilir ve bölümler hazır oldukça tarayıcıya akar.
+        """
+        spec = user_content_spec or self.registered_sites.get(site_topic, {}).get("user_content_spec")
+        site_id = site_topic.lower().replace(' ', '_')
+        url = self._get_server_agent().add_preview(site_id, lambda: self._stream_preview_page(site_topic, spec))
+        if url:
+            logger.info(f"Preview for {site_topic} available at {url}")
+        return url
 
     def _get_latest_user_content_for_update(self, site_topic):
         # Bu metod, bir güncelleme için en son kullanıcı tercihlerini/içeriklerini getirmelidir.
@@ -271,7 +420,8 @@ class ManagerAgent(BaseAgent):
             return {"title": "Güncellenmiş Web Sitesi (Varsayılan)", 
                     "sections": [{"title": "Varsayılan Güncelleme", "type": "text", "source":"local", "content": "Web sitesi içeriği otomatik olarak güncellendi."}]}
 
-        updated_spec = original_spec.copy() # Derin kopya gerekebilir iç içe dict/list varsa
+        # Derin kopya: iç içe bölüm listesi değiştirildiğinde kayıtlı orijinal spec (ve manifest karşılaştırması) bozulmasın
+        updated_spec = copy.deepcopy(original_spec)
         updated_spec["title"] = original_spec.get("title", site_topic) + " - (Güncellendi)"
         
         # Örnek bir bölüm ekleyelim veya değiştirelim
@@ -303,7 +453,6 @@ class ManagerAgent(BaseAgent):
 
         site_info = self.registered_sites[site_topic]
         site_folder_path = site_info["folder"]
-        index_html_path = os.path.join(site_folder_path, "index.html")
 
         # 1. Güncel içerik speklerini al (veya oluştur)
         latest_user_content_spec = self._get_latest_user_content_for_update(site_topic)
@@ -314,48 +463,63 @@ class ManagerAgent(BaseAgent):
             logger.error("Editor Agent not found! Cannot update content.")
             return
         
-        content_task = {"topic": site_topic, "user_content": latest_user_content_spec}
+        previous_manifest = self._load_manifest(site_topic)
+        content_task = {"topic": site_topic, "user_content": latest_user_content_spec,
+                        "manifest": previous_manifest["sections"]}
         processed_content = editor_agent.execute(content_task)
         logger.info(f"Editor Agent completed content update processing for {site_topic}.")
 
-        # 3. HTML'i BeautifulSoup ile güncelle
-        try:
-            with open(index_html_path, "r", encoding='utf-8') as f:
-                html_doc = f.read()
-            
-            soup = BeautifulSoup(html_doc, 'html.parser')
-
-            if soup.title:
-                soup.title.string = processed_content.get("page_title", site_topic + " - Güncel")
-            
-            h1_tag = soup.find('h1')
-            if h1_tag:
-                h1_tag.string = processed_content.get("main_heading", site_topic + " - Güncel")
-            
-            content_section_tag = soup.find('section', id='content')
-            if content_section_tag:
-                content_section_tag.clear() 
-                for section in processed_content.get("sections", []):
-                    section_title_tag = soup.new_tag('h2')
-                    section_title_tag.string = section.get("title", "Bölüm")
-                    content_section_tag.append(section_title_tag)
-                    
-                    section_content_div = soup.new_tag('div')
-                    section_content_div.append(BeautifulSoup(section.get("content", ""), 'html.parser'))
-                    content_section_tag.append(section_content_div)
-            
-            # Banner görsellerini de güncelleyebiliriz (eğer yeni görseller varsa)
-            # Bu örnekte banner görselleri ilk oluşturmadaki gibi kalıyor.
-            # İstenirse _get_latest_user_content_for_update banner_images'ı da güncelleyebilir.
-
-            with open(index_html_path, "w", encoding='utf-8') as f:
-                f.write(str(soup))
-            logger.info(f"Content updated successfully for {site_topic} in {index_html_path}.")
+        # Hiçbir bölüm değişmediyse sayfa yeniden yazılmaz
+        manifest = self._build_manifest(processed_content)
+        changed_sections = [s["title"] for s in processed_content.get("sections", []) if not s.get("reused")]
+        if (not changed_sections and manifest["order"] == previous_manifest.get("order")
+                and manifest["page_title"] == previous_manifest.get("page_title")
+                and manifest["main_heading"] == previous_manifest.get("main_heading")):
+            logger.info(f"No content changes for {site_topic}, skipping rebuild.")
+            return
+        logger.info(f"Sections changed for {site_topic}: {changed_sections}")
 
-        except FileNotFoundError:
-            logger.error(f"Error: index.html not found for {site_topic} at {index_html_path} during update.")
+        # 3. Sayfayı şablondan yeniden oluştur (tema ve banner görselleri ilk oluşturmadaki gibi kalır)
+        design_agent = self.agents.get("Design Agent")
+        if not design_agent:
+            logger.error("Design Agent not found! Cannot update content.")
+            return
+        theme = (site_info.get("user_content_spec") or {}).get("theme")
+        # Yeni sürüm canlı sürümden hardlink'lerle başlar; yalnızca index.html yeniden yazılır
+        site_id = os.path.basename(site_folder_path)
+        staging_dir = self.releases.stage(site_id, site_folder_path)
+        try:
+            page = self._render_page(design_agent, site_topic, theme, processed_content, site_info.get("banner_images", []),
+                                     staging_dir)
+            index_html_path = os.path.join(staging_dir, "index.html")
+            self._write_atomic(index_html_path, page["html"])
+            precompress_file(index_html_path)
+            # Önceki sürümden taşınan, yeni sayfanın artık kullanmadığı CSS ve görsel varyantları yayınlanmaz
+            prune_unreferenced(staging_dir)
+            version = self.releases.publish(site_id, staging_dir, site_folder_path, manifest=manifest)
+            self._save_manifest(site_topic, manifest)
+            logger.info(f"Content updated successfully for {site_topic} (version {version}).")
         except Exception as e:
             logger.error(f"Error updating content for {site_topic}: {e}", exc_info=True)
+            self.releases.discard(staging_dir)
+
+    def rollback_website(self, site_topic, version=None):
+        """
+        Siteyi verilen (verilmezse bir önceki) yayınlanmış sürüme döndürür; yeniden build yapılmaz.
+        Geri dönülen sürüm adını veya None döndürür.
+        """
+        site_folder_path = (self.registered_sites.get(site_topic) or self.registry.get_site(site_topic) or {}).get("folder")
+        if not site_folder_path:
+            logger.error(f"Site {site_topic} not found. Cannot roll back.")
+            return None
+        site_id = os.path.basename(site_folder_path)
+        version = self.releases.rollback(site_id, site_folder_path, version)
+        if version:
+            # Sonraki artımlı güncelleme canlı sürümle karşılaştırılmalı; manifest'i olmayan (eski)
+            # sürümlerde kayıt boşaltılır ve bir sonraki güncelleme tüm bölümleri yeniden üretir
+            manifest = self.releases.manifest(site_id, version) or {"order": [], "sections": {}}
+            self.registry.upsert_site(site_topic, manifest=manifest)
+        return version
 
 
     def schedule_content_update(self, site_topic, schedule_type="daily", time_str="21:00"):
@@ -364,62 +528,46 @@ class ManagerAgent(BaseAgent):
             return
 
         job_function = lambda: self.update_website_content(site_topic=site_topic)
-        
+        tags = (site_topic, 'content-update')
+
         if schedule_type == "daily":
-            schedule.every().day.at(time_str).do(job_function).tag(site_topic, 'content-update')
+            self.scheduler.daily(site_topic, job_function, at=time_str, tags=tags)
             logger.info(f"Content update for {site_topic} scheduled daily at {time_str}.")
         elif schedule_type == "weekly":
             # Örnek: Her Pazartesi belirli bir saatte
-            schedule.every().monday.at(time_str).do(job_function).tag(site_topic, 'content-update')
+            self.scheduler.weekly(site_topic, job_function, weekday="monday", at=time_str, tags=tags)
             logger.info(f"Content update for {site_topic} scheduled weekly (Mondays at {time_str}).")
         elif schedule_type == "every_x_minutes": # Test için
             try:
                 minutes = int(time_str) # time_str burada dakika sayısı olmalı
-                schedule.every(minutes).minutes.do(job_function).tag(site_topic, 'content-update')
-                logger.info(f"Content update for {site_topic} scheduled every {minutes} minutes.")
             except ValueError:
                  logger.error(f"Invalid time_str '{time_str}' for 'every_x_minutes'. Must be an integer.")
                  return
+            self.scheduler.every(site_topic, job_function, seconds=minutes * 60, tags=tags)
+            logger.info(f"Content update for {site_topic} scheduled every {minutes} minutes.")
         else:
             logger.warning(f"Unsupported schedule type: {schedule_type}")
             return
 
-        if not self.scheduler_thread or not self.scheduler_thread.is_alive():
+        if not self.scheduler.is_running():
             self.start_scheduler()
 
     def start_scheduler(self):
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
+        if self.scheduler.is_running():
             logger.info("Scheduler is already running.")
             return
-            
-        self.should_run_scheduler = True
-        self.scheduler_thread = Thread(target=self._run_scheduler_loop, name="SchedulerThread")
-        self.scheduler_thread.daemon = True # Ana program sonlandığında thread de sonlansın
-        self.scheduler_thread.start()
+        self.scheduler.start()
         logger.info("Scheduler started.")
 
-    def _run_scheduler_loop(self):
-        logger.info("Scheduler loop started.")
-        while self.should_run_scheduler:
-            schedule.run_pending()
-            time.sleep(1) # 1 saniyede bir kontrol et
-        logger.info("Scheduler loop stopped.")
+    def get_scheduler_metrics(self):
+        """Zamanlayıcı gecikme (lag), kuyruk derinliği ve çakışma nedeniyle atlanan çalıştırma sayıları."""
+        return self.scheduler.metrics()
 
     def stop_scheduler(self):
         logger.info("Attempting to stop scheduler...")
-        self.should_run_scheduler = False
-        # Tüm planlanmış görevleri iptal et (isteğe bağlı, tag kullanarak)
-        # schedule.clear('content-update') # Sadece bu uygulamaya ait görevleri temizle
-        # schedule.clear() # Tüm görevleri temizler
-        
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            try:
-                self.scheduler_thread.join(timeout=5) # Thread'in bitmesini bekle (max 5sn)
-                if self.scheduler_thread.is_alive():
-                    logger.warning("Scheduler thread did not stop in time.")
-            except Exception as e:
-                logger.error(f"Error stopping scheduler thread: {e}")
-        self.scheduler_thread = None
+        # Planlanmış görevler korunur; start_scheduler ile kaldığı yerden devam eder.
+        # Bir sitenin görevlerini iptal etmek için: self.scheduler.cancel(site_topic)
+        self.scheduler.stop(timeout=5)
         logger.info("Scheduler stopped.")
 
     def stop_website(self, site_topic):
@@ -427,8 +575,9 @@ class ManagerAgent(BaseAgent):
         if site_topic in self.registered_sites:
             server_agent_instance = self.registered_sites[site_topic].get("server_agent_instance")
             if server_agent_instance:
-                server_agent_instance.stop_server() # Bu metod ServerAgent'ta olmalı
-                logger.info(f"Server for {site_topic} stopped.")
+                # Paylaşılan sunucu çalışmaya devam eder, yalnızca bu sitenin yönlendirmesi kaldırılır
+                server_agent_instance.remove_site(self.registered_sites[site_topic].get("site_id"))
+                logger.info(f"Website {site_topic} removed from the server.")
             else:
                 logger.warning(f"No server agent instance found for {site_topic} to stop.")
             
@@ -446,9 +595,27 @@ class ManagerAgent(BaseAgent):
         if task:
             action = task.get("action")
             if action == "create_site":
-                self.create_website(task.get("topic"), task.get("user_content"))
+                if task.get("async"):
+                    return {"job_id": self.submit_website(task.get("topic"), task.get("user_content"))}
+                return self.create_website(task.get("topic"), task.get("user_content"))
+            elif action == "create_sites":
+                # task = {"action": "create_sites", "sites": [{"topic": ..., "user_content": {...}}, ...], "wait": False}
+                job_ids = [self.submit_website(site.get("topic"), site.get("user_content")) for site in task.get("sites", [])]
+                if task.get("wait"):
+                    # Boş listeyle wait() kuyruktaki tüm işleri bekler; yalnızca bu çağrının işleri beklenir
+                    return {"jobs": self._get_build_queue().wait(job_ids) if job_ids else []}
+                return {"job_ids": job_ids}
+            elif action == "build_status":
+                return {"jobs": self.get_build_status(task.get("job_id")),
+                        "summary": self.build_queue.summary() if self.build_queue else {}}
+            elif action == "preview_site":
+                # task = {"action": "preview_site", "topic": "...", "user_content": {...}}
+                return {"url": self.preview_website(task.get("topic"), task.get("user_content"))}
             elif action == "update_site":
                 self.update_website_content(task.get("topic"))
+            elif action == "rollback_site":
+                # task = {"action": "rollback_site", "topic": "...", "version": None}  # None: bir önceki sürüm
+                return {"version": self.rollback_website(task.get("topic"), task.get("version"))}
             elif action == "stop_site":
                 self.stop_website(task.get("topic"))
             # ... diğer eylemler
\ No newline at end of file
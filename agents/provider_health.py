@@ -0,0 +1,85 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHealth:
+    """
+    Bir AI sağlayıcısının gecikme geçmişini ve devre kesici (circuit breaker) durumunu tutar.
+    Art arda failure_threshold hata alınınca devre açılır ve cooldown_seconds boyunca
+    sağlayıcı atlanır; süre dolunca tek bir deneme isteğine izin verilir (half-open).
+    """
+
+    def __init__(self, name: str, window: Optional[int] = None, failure_threshold: Optional[int] = None,
+                 cooldown_seconds: Optional[float] = None):
+        self.name = name
+        self.latencies = deque(maxlen=window or int(os.getenv("AI_LATENCY_WINDOW", "100")))
+        self.failure_threshold = failure_threshold or int(os.getenv("AI_BREAKER_FAILURES", "5"))
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("AI_BREAKER_COOLDOWN", "60"))
+        self.consecutive_failures = 0
+        self.opened_at = None  # Devre açıksa açıldığı zaman
+        self.trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown_seconds or self.trial_in_progress:
+                return False
+            self.trial_in_progress = True  # half-open: tek deneme
+            return True
+
+    def is_available(self) -> bool:
+        """allow_request() ile aynı karar, ancak half-open deneme hakkını ayırmaz."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            return time.monotonic() - self.opened_at >= self.cooldown_seconds and not self.trial_in_progress
+
+    def release_trial(self):
+        """Sonucu kaydedilmeden biten isteğin (ör. yarıda bırakılan akış) deneme hakkını geri verir."""
+        with self._lock:
+            self.trial_in_progress = False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+            if self.opened_at is not None:
+                logger.info(f"Circuit for provider '{self.name}' closed again.")
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+            self.consecutive_failures += 1
+            self.trial_in_progress = False
+            if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit for provider '{self.name}' opened after "
+                                   f"{self.consecutive_failures} consecutive failures.")
+                self.opened_at = time.monotonic()
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "samples": len(self.latencies),
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_open": self.opened_at is not None,
+        }
@@ -1,9 +1,15 @@
 import os
+import time
 import logging
-from typing import Dict, Callable
-from agents.ai_agents.openai_agent import ask_openai
-from agents.ai_agents.cohere_agent import ask_cohere
-from agents.ai_agents.mistral_agent import ask_mistral
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Callable, Iterator, List, Optional
+from agents.ai_agents.openai_agent import ask_openai, stream_openai, MODEL as OPENAI_MODEL
+from agents.ai_agents.cohere_agent import ask_cohere, stream_cohere, MODEL as COHERE_MODEL
+from agents.ai_agents.mistral_agent import ask_mistral, ask_mistral_batch, stream_mistral, MODEL as MISTRAL_MODEL
+from agents.response_cache import ResponseCache
+from agents.provider_health import ProviderHealth
+from agents.rate_limiter import ProviderRateLimiter, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -14,23 +20,369 @@ PROVIDERS: Dict[str, Callable[[str, str], str]] = {
     "mistral": ask_mistral
 }
 
-def generate_content(prompt: str, purpose: str = "default") -> str:
+# Akış (streaming) destekleyen karşılıkları
+STREAMING_PROVIDERS: Dict[str, Callable[[str, str], Iterator[str]]] = {
+    "openai": stream_openai,
+    "cohere": stream_cohere,
+    "mistral": stream_mistral
+}
+
+# Birden çok prompt'u tek istekte gönderebilen sağlayıcılar
+BATCH_PROVIDERS: Dict[str, Callable[[List[str], str], List[str]]] = {
+    "mistral": ask_mistral_batch
+}
+
+# Önbellek anahtarında kullanılan model adları
+PROVIDER_MODELS: Dict[str, str] = {
+    "openai": OPENAI_MODEL,
+    "cohere": COHERE_MODEL,
+    "mistral": MISTRAL_MODEL
+}
+
+# Sağlayıcı başına gecikme geçmişi ve devre kesici
+PROVIDER_HEALTH: Dict[str, ProviderHealth] = {name: ProviderHealth(name) for name in PROVIDERS}
+
+# Sağlayıcı başına istek/dakika ve token/dakika sınırı (AI_RPM_<SAĞLAYICI>, AI_TPM_<SAĞLAYICI>; 0 = sınırsız)
+PROVIDER_RATE_LIMITS: Dict[str, ProviderRateLimiter] = {name: ProviderRateLimiter(name) for name in PROVIDERS}
+
+# Sağlayıcı başına eşzamanlı istek sınırı (AI_MAX_CONCURRENCY_<SAĞLAYICI>, varsayılan AI_MAX_CONCURRENCY)
+PROVIDER_CONCURRENCY: Dict[str, threading.BoundedSemaphore] = {
+    name: threading.BoundedSemaphore(int(os.getenv(f"AI_MAX_CONCURRENCY_{name.upper()}",
+                                                   os.getenv("AI_MAX_CONCURRENCY", "4"))))
+    for name in PROVIDERS
+}
+
+# Hedged (yedekli) istekler için thread havuzu; yavaş kalan çağrı arka planda tamamlanır
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_HEDGE_MAX_WORKERS", "8")),
+                                     thread_name_prefix="ProviderHedge")
+
+# Aynı prompt/purpose için tekrar eden çağrıları önler (AI_CACHE_ENABLED=0 ile kapatılır)
+response_cache = ResponseCache()
+
+
+def _is_cacheable(content: str) -> bool:
+    # ask_* fonksiyonları hataları "Error: ..." metni olarak döndürür; bunlar önbelleğe alınmaz
+    return bool(content) and not content.startswith("Error")
+
+
+def _provider_chain() -> List[str]:
+    """
+    Denenecek sağlayıcıların sırası. AI_PROVIDER_CHAIN (örn. "openai,cohere,mistral")
+    tanımlı değilse yalnızca AI_PROVIDER kullanılır.
+    """
+    chain_env = os.getenv("AI_PROVIDER_CHAIN")
+    if chain_env:
+        return [name.strip().lower() for name in chain_env.split(",") if name.strip()]
+    return [os.getenv("AI_PROVIDER", "openai").lower()]
+
+
+def _timed_call(provider: str, prompt: str, purpose: str) -> str:
+    """Sağlayıcıyı çağırır; süreyi ve sonucu PROVIDER_HEALTH'e kaydeder."""
+    health = PROVIDER_HEALTH[provider]
+    PROVIDER_RATE_LIMITS[provider].acquire(tokens=estimate_tokens(prompt))
+    with PROVIDER_CONCURRENCY[provider]:
+        started = time.monotonic()
+        try:
+            content = PROVIDERS[provider](prompt, purpose)
+        except Exception:
+            health.record_failure(time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+    if _is_cacheable(content):
+        health.record_success(elapsed)
+    else:
+        health.record_failure(elapsed)
+    return content
+
+
+def _hedge_delay(provider: str) -> float:
+    """Yedek sağlayıcının ateşlenmeden önce beklenecek süre: gözlenen p95 gecikme."""
+    p95 = PROVIDER_HEALTH[provider].percentile(95)
+    if p95 is None or len(PROVIDER_HEALTH[provider].latencies) < int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20")):
+        return float(os.getenv("AI_HEDGE_DELAY", "10"))
+    return p95
+
+
+def _attempt(provider: str, prompt: str, purpose: str, caching: bool) -> str:
+    """
+    Tek sağlayıcı denemesi. Önbellek o sağlayıcının (ve modelinin) anahtarıyla okunur ve
+    yazılır; yedek sağlayıcının yanıtı birincilin anahtarına yazılmaz. Önbellek isabeti
+    devre kesicide half-open deneme hakkı ayırmaz.
+    """
+    key = ResponseCache.make_key(provider, PROVIDER_MODELS.get(provider, ""), prompt, purpose)
+    if caching:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    health = PROVIDER_HEALTH[provider]
+    if not health.allow_request():
+        return f"Error: provider {provider} unavailable (circuit open)"
+    if not caching:
+        return _timed_call(provider, prompt, purpose)
+
+    called = False
+
+    def compute() -> str:
+        nonlocal called
+        called = True
+        return _timed_call(provider, prompt, purpose)
+
+    try:
+        return response_cache.get_or_compute(key, compute, should_cache=_is_cacheable)
+    finally:
+        if not called:
+            # Yanıt eşzamanlı bir çağrıdan geldi; ayrılan deneme hakkı kullanılmadan geri verilir
+            health.release_trial()
+
+
+def _call_with_failover(chain: List[str], prompt: str, purpose: str, caching: bool = False) -> str:
+    """
+    Sağlayıcıları sırayla dener, devresi açık olanları atlar. AI_HEDGE_ENABLED=1 ise
+    mevcut çağrı p95 süresini aştığında sıradaki sağlayıcı da ateşlenir ve ilk başarılı
+    yanıt kullanılır.
+    """
+    # Seçim is_available() ile yapılır; deneme hakkı yalnızca gerçekten çağrılacak sağlayıcı
+    # için _attempt içinde ayrılır.
+    remaining = [name for name in chain if name in PROVIDERS]
+
+    def next_available():
+        while remaining:
+            provider = remaining.pop(0)
+            if PROVIDER_HEALTH[provider].is_available():
+                return provider
+            logger.info(f"Skipping provider {provider}: circuit open.")
+        return None
+
+    last_result = None
+    if os.getenv("AI_HEDGE_ENABLED", "0") != "1":
+        provider = next_available()
+        while provider:
+            try:
+                last_result = _attempt(provider, prompt, purpose, caching)
+            except Exception as e:
+                logger.error(f"Error generating content with {provider}: {e}", exc_info=True)
+                last_result = f"Error generating content with {provider}: {str(e)}"
+            if _is_cacheable(last_result):
+                return last_result
+            logger.warning(f"Provider {provider} failed, trying next in chain.")
+            provider = next_available()
+    else:
+        pending = {}
+
+        def launch(provider):
+            pending[_hedge_executor.submit(_attempt, provider, prompt, purpose, caching)] = provider
+
+        current = next_available()
+        if current:
+            launch(current)
+        while pending:
+            timeout = _hedge_delay(current) if remaining else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedge = next_available()
+                if hedge:
+                    logger.info(f"Provider {current} slower than {timeout:.2f}s, hedging with {hedge}.")
+                    current = hedge
+                    launch(hedge)
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    last_result = future.result()
+                except Exception as e:
+                    logger.error(f"Error generating content with {provider}: {e}", exc_info=True)
+                    last_result = f"Error generating content with {provider}: {str(e)}"
+                if _is_cacheable(last_result):
+                    return last_result  # Geride kalan çağrıların sonucu yok sayılır
+                logger.warning(f"Provider {provider} failed during hedged request.")
+            if not pending:
+                current = next_available()
+                if current:
+                    launch(current)
+
+    if last_result is None:
+        last_result = f"Error: no AI provider available (chain: {', '.join(chain)})"
+        logger.error(last_result)
+    return last_result
+
+
+def generate_content(prompt: str, purpose: str = "default", use_cache: bool = True) -> str:
     """
     Belirli bir amaç için seçilen sağlayıcıya göre içerik üretir.
+    Yanıtlar, yanıtı veren sağlayıcının (sağlayıcı, model, prompt, purpose) anahtarıyla önbelleğe alınır.
+    AI_PROVIDER_CHAIN tanımlıysa sağlayıcı hata verdiğinde zincirdeki sıradakine geçilir.
     """
-    provider = os.getenv("AI_PROVIDER", "openai").lower()
-    logger.info(f"Using AI provider: {provider}")
+    chain = _provider_chain()
+    provider = chain[0]
+    logger.info(f"Using AI provider chain: {', '.join(chain)}")
 
-    if provider not in PROVIDERS:
-        error_msg = f"Unsupported AI provider: {provider}"
+    unknown = [name for name in chain if name not in PROVIDERS]
+    if unknown:
+        error_msg = f"Unsupported AI provider: {', '.join(unknown)}"
         logger.error(error_msg)
         return error_msg
 
     try:
-        content = PROVIDERS[provider](prompt, purpose)
-        logger.debug(f"Content generated successfully by {provider}")
+        # Önbellek her sağlayıcı için ayrı okunur/yazılır (bkz. _attempt)
+        content = _call_with_failover(chain, prompt, purpose,
+                                      caching=use_cache and os.getenv("AI_CACHE_ENABLED", "1") != "0")
+        logger.debug(f"Content generated by provider chain {', '.join(chain)}")
         return content
     except Exception as e:
         error_msg = f"Error generating content with {provider}: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+
+def _batch_call(provider: str, prompts: List[str], purpose: str) -> List[str]:
+    """Toplu çağrı; sağlayıcının eşzamanlılık sınırını ve sağlık kaydını kullanır."""
+    health = PROVIDER_HEALTH[provider]
+    PROVIDER_RATE_LIMITS[provider].acquire(tokens=sum(estimate_tokens(prompt) for prompt in prompts))
+    with PROVIDER_CONCURRENCY[provider]:
+        started = time.monotonic()
+        try:
+            results = BATCH_PROVIDERS[provider](prompts, purpose)
+        except Exception:
+            health.record_failure(time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+    if any(_is_cacheable(result) for result in results):
+        health.record_success(elapsed)
+    else:
+        health.record_failure(elapsed)
+    return results
+
+
+def generate_content_batch(prompts: List[str], purpose: str = "default", use_cache: bool = True,
+                           max_workers: Optional[int] = None) -> List[dict]:
+    """
+    Birden çok prompt için içerik üretir. Sonuçlar prompt sırasıyla
+    {"content": str | None, "error": str | None} sözlükleri olarak döner.
+    Önbellekte olanlar sağlayıcıya gitmez. Birincil sağlayıcı toplu isteği destekliyorsa
+    (BATCH_PROVIDERS) prompt'lar AI_BATCH_SIZE'lık paketlerle gönderilir; aksi halde ve
+    paket içinde başarısız kalanlar için her prompt generate_content ile eşzamanlı işlenir.
+    Eşzamanlılık sağlayıcı başına PROVIDER_CONCURRENCY ile sınırlıdır.
+    """
+    chain = _provider_chain()
+    provider = chain[0]
+    caching = use_cache and os.getenv("AI_CACHE_ENABLED", "1") != "0"
+    model = PROVIDER_MODELS.get(provider, "")
+    results: List[Optional[str]] = [None] * len(prompts)
+
+    pending = []
+    for index, prompt in enumerate(prompts):
+        cached = response_cache.get(ResponseCache.make_key(provider, model, prompt, purpose)) if caching else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append(index)
+
+    workers = max_workers or int(os.getenv("AI_BATCH_MAX_WORKERS", "8"))
+    if pending and provider in BATCH_PROVIDERS and PROVIDER_HEALTH[provider].allow_request():
+        batch_size = int(os.getenv("AI_BATCH_SIZE", "8"))
+        packs = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        with ThreadPoolExecutor(max_workers=min(workers, len(packs)), thread_name_prefix="ProviderBatch") as executor:
+            futures = [executor.submit(_batch_call, provider, [prompts[i] for i in pack], purpose) for pack in packs]
+            for pack, future in zip(packs, futures):
+                try:
+                    pack_results = future.result()
+                except Exception as e:
+                    logger.error(f"Batch request to {provider} failed: {e}", exc_info=True)
+                    continue
+                for index, content in zip(pack, pack_results):
+                    if _is_cacheable(content):
+                        results[index] = content
+                        if caching:
+                            response_cache.put(ResponseCache.make_key(provider, model, prompts[index], purpose), content)
+        pending = [index for index in pending if results[index] is None]
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending)), thread_name_prefix="ProviderBatch") as executor:
+            futures = {index: executor.submit(generate_content, prompts[index], purpose, use_cache) for index in pending}
+            for index, future in futures.items():
+                results[index] = future.result()  # generate_content hata fırlatmaz, hata metni döndürür
+
+    return [{"content": content, "error": None} if _is_cacheable(content) else {"content": None, "error": content}
+            for content in results]
+
+
+def provider_stats() -> Dict[str, dict]:
+    """Sağlayıcı başına gecikme yüzdelikleri, devre kesici durumu ve hız sınırı bekleme süreleri."""
+    stats = {}
+    for name, health in PROVIDER_HEALTH.items():
+        stats[name] = health.snapshot()
+        stats[name]["rate_limit"] = dict(PROVIDER_RATE_LIMITS[name].stats)
+    return stats
+
+
+def generate_content_stream(prompt: str, purpose: str = "default", use_cache: bool = True) -> Iterator[str]:
+    """
+    generate_content'in akış sürümü: metni sağlayıcıdan geldikçe parça parça üretir.
+    Önbellekte varsa tek parça olarak döner; tamamlanan yanıtlar önbelleğe yazılır.
+    """
+    # Akışta yarıda sağlayıcı değiştirilemez; zincirde devresi kapalı ilk sağlayıcı kullanılır.
+    # Seçim is_available() ile yapılır: atlanan sağlayıcılar ve önbellekten dönen yanıtlar
+    # half-open deneme hakkı ayırmaz.
+    chain = _provider_chain()
+    unknown = [name for name in chain if name not in STREAMING_PROVIDERS]
+    if unknown:
+        error_msg = f"Unsupported AI provider: {', '.join(unknown)}"
+        logger.error(error_msg)
+        yield error_msg
+        return
+    provider = next((name for name in chain if PROVIDER_HEALTH[name].is_available()), None)
+    if provider is None:
+        error_msg = f"Error: no AI provider available (chain: {', '.join(chain)})"
+        logger.error(error_msg)
+        yield error_msg
+        return
+    logger.info(f"Using AI provider (streaming): {provider}")
+
+    caching = use_cache and os.getenv("AI_CACHE_ENABLED", "1") != "0"
+    key = ResponseCache.make_key(provider, PROVIDER_MODELS.get(provider, ""), prompt, purpose)
+    if caching:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    health = PROVIDER_HEALTH[provider]
+    # Devre half-open ise deneme hakkı burada ayrılır ve aşağıda mutlaka bırakılır. Seçimden bu yana
+    # hakkı başka bir istek aldıysa (veya devre yeniden açıldıysa) sağlayıcı çağrılmaz.
+    if not health.allow_request():
+        error_msg = f"Error: provider {provider} became unavailable (circuit open)"
+        logger.error(error_msg)
+        yield error_msg
+        return
+    recorded = False
+    parts = []
+    started = time.monotonic()
+    try:
+        try:
+            PROVIDER_RATE_LIMITS[provider].acquire(tokens=estimate_tokens(prompt))
+            # Eşzamanlılık sınırı _timed_call'daki gibi uygulanır ve akış boyunca tutulur
+            with PROVIDER_CONCURRENCY[provider]:
+                started = time.monotonic() # Gecikme kaydı hız sınırı ve kuyruk beklemesini içermez
+                for chunk in STREAMING_PROVIDERS[provider](prompt, purpose):
+                    parts.append(chunk)
+                    yield chunk
+        except Exception as e:
+            health.record_failure(time.monotonic() - started)
+            recorded = True
+            error_msg = f"Error generating content with {provider}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            yield error_msg
+            return
+
+        content = "".join(parts)
+        if _is_cacheable(content):
+            health.record_success(time.monotonic() - started)
+        else:
+            health.record_failure(time.monotonic() - started)
+        recorded = True
+        if caching and _is_cacheable(content):
+            response_cache.put(key, content)
+    finally:
+        if not recorded:
+            # Çağıran akışı yarıda bıraktı (GeneratorExit): sonuç bilinmiyor, yalnızca deneme hakkı geri verilir
+            health.release_trial()
@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Klasik token bucket: kapasite kadar birikebilir, dakikada rate_per_minute kadar dolar.
+    rate_per_minute <= 0 ise sınırsızdır.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_second <= 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount kadar token için beklenmesi gereken süre (0 ise hemen alınabilir)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # Kapasiteden büyük istekler kovayı tamamen doldurup boşaltarak geçer
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+
+class ProviderRateLimiter:
+    """
+    Bir sağlayıcı için istek/dakika ve tahmini token/dakika sınırı. acquire() kapasite
+    açılana kadar çağıranı bekletir; böylece kotanın üstüne çıkıp 429 almak yerine
+    kota sınırında sabit bir hızla çalışılır.
+    """
+
+    def __init__(self, name: str, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.name = name
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv(f"AI_RPM_{name.upper()}", "0"))
+        if tokens_per_minute is None:
+            tokens_per_minute = float(os.getenv(f"AI_TPM_{name.upper()}", "0"))
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def acquire(self, requests: int = 1, tokens: int = 0) -> float:
+        """Kapasite açılana kadar bekler ve hakkı düşer. Beklenen süreyi döndürür."""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = max(self.request_bucket.wait_time(requests, now), self.token_bucket.wait_time(tokens, now))
+                if delay <= 0:
+                    self.request_bucket.take(requests)
+                    self.token_bucket.take(tokens)
+                    waited = now - started
+                    self.stats["acquired"] += 1
+                    if waited > 0.001:
+                        self.stats["waited"] += 1
+                        self.stats["total_wait_seconds"] += waited
+                        self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+                    return waited
+            logger.debug(f"Rate limit reached for {self.name}, waiting {delay:.2f}s")
+            time.sleep(delay)
+
+
+def estimate_tokens(text: str, completion_tokens: int = 300) -> int:
+    """Kaba token tahmini: ~4 karakter/token artı beklenen yanıt uzunluğu."""
+    return len(text) // 4 + 1 + completion_tokens
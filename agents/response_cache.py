@@ -0,0 +1,132 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    AI sağlayıcı yanıtları için iki katmanlı önbellek.
+    1. katman: süreç içi LRU (OrderedDict). 2. katman (isteğe bağlı): TTL'li SQLite tablosu.
+    Aynı anahtar için eşzamanlı gelen istekler tek bir upstream çağrısında birleştirilir (single-flight).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+        self.db_path = db_path if db_path is not None else os.getenv("AI_CACHE_DB")  # Boşsa SQLite katmanı kapalı
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> {"event": Event, "value": ..., "error": ...}
+        self._db_local = threading.local()  # sqlite3 bağlantıları thread'ler arasında paylaşılamaz
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0}
+        if self.db_path:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            with self._db() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                             "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, purpose: str) -> str:
+        raw = json.dumps([provider, model, prompt, purpose], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._db_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._db_local.conn = conn
+        return conn
+
+    def _expired(self, stored_at: float) -> bool:
+        return (time.time() - stored_at) >= self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if not self._expired(item[0]):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return item[1]
+                del self._memory[key]
+
+        if self.db_path:
+            try:
+                row = self._db().execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache read failed: {e}")
+                row = None
+            if row and not self._expired(row[1]):
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.stats["db_hits"] += 1
+                return row[0]
+        return None
+
+    def _remember(self, key: str, value: str, stored_at: float):
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key: str, value: str):
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        if self.db_path:
+            try:
+                with self._db() as conn:
+                    conn.execute("INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                                 (key, value, stored_at))
+                    conn.execute("DELETE FROM responses WHERE stored_at < ?", (stored_at - self.ttl_seconds,))
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], str],
+                       should_cache: Callable[[str], bool] = lambda value: True) -> str:
+        """
+        Önbellekte varsa değeri döndürür; yoksa compute() çağrılır. Aynı anahtar için
+        bekleyen bir çağrı varsa yeni çağrı yapılmaz, onun sonucu beklenir.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = {"event": threading.Event(), "value": None, "error": None}
+                self._inflight[key] = flight
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight["event"].wait()
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["value"]
+
+        try:
+            value = compute()
+            flight["value"] = value
+            if should_cache(value):
+                self.put(key, value)
+            return value
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight["event"].set()
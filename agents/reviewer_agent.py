@@ -19,6 +19,11 @@ class ReviewerAgent(BaseAgent):
             return None
 
     def execute(self, task):
+        """
+        task["site_folder"] zorunludur. ManagerAgent sayfayı bellekte oluşturduysa
+        task["html_content"] (veya ayrıştırılmış ağaç olarak task["soup"]) ve
+        task["css_content"] verilir; bu durumda dosyalar diskten tekrar okunmaz.
+        """
         site_folder = task.get('site_folder')
         logger.info(f"{self.name}: Reviewing website files in: {site_folder}")
         report = {"errors": [], "warnings": [], "info": []}
@@ -32,13 +37,17 @@ class ReviewerAgent(BaseAgent):
         style_css_path = os.path.join(site_folder, "style.css")
 
         # HTML Kontrolleri
-        html_content = self._read_file(index_html_path)
-        if not html_content:
+        soup = task.get('soup')
+        html_content = task.get('html_content')
+        if soup is None and html_content is None:
+            html_content = self._read_file(index_html_path)
+        if soup is None and not html_content:
             report["errors"].append(f"index.html not found or unreadable in {site_folder}.")
-        elif not html_content.strip():
+        elif soup is None and not html_content.strip():
             report["errors"].append("index.html is empty.")
         else:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            if soup is None:
+                soup = BeautifulSoup(html_content, 'html.parser')
             if not soup.title or not soup.title.string.strip():
                 report["warnings"].append("Missing or empty <title> tag.")
             if not soup.find('h1') or not soup.find('h1').string.strip():
@@ -50,7 +59,13 @@ class ReviewerAgent(BaseAgent):
                     report["warnings"].append(f"Image missing alt text: {str(img)[:50]}...")
 
         # CSS Kontrolleri
-        css_content = self._read_file(style_css_path)
+        css_content = task.get('css_content')
+        if css_content is None:
+            # Stil dosyası parmak izli adla yayınlanabilir; adı sayfadaki <link> etiketinden alınır
+            stylesheet_link = soup.find('link', rel='stylesheet') if soup is not None else None
+            if stylesheet_link and stylesheet_link.get('href'):
+                style_css_path = os.path.join(site_folder, os.path.basename(stylesheet_link['href']))
+            css_content = self._read_file(style_css_path)
         if not css_content:
             report["errors"].append(f"style.css not found or unreadable in {site_folder}.")
         elif not css_content.strip():
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeCache:
+    """
+    Kazınan sayfalar için disk üzerinde içerik adresli önbellek.
+    Anahtar (url, selector) çiftinin SHA-256 özetidir; her kayıt çıkarılan metni ve
+    yanıtın ETag / Last-Modified doğrulayıcılarını saklar. TTL içindeki kayıtlar ağa
+    gitmeden döner, süresi geçenler koşullu GET ile yeniden doğrulanır.
+    """
+
+    def __init__(self, cache_dir=None, ttl_seconds=None, max_bytes=None, max_age_seconds=None):
+        self.cache_dir = cache_dir or os.getenv("SCRAPE_CACHE_DIR", "output/cache/scrape")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        # Bu süre boyunca hiç kullanılmayan kayıtlar (yeniden doğrulanmadan) silinir
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else float(os.getenv("SCRAPE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def _key(self, url, selector):
+        return hashlib.sha256(f"{url}\0{selector}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url, selector):
+        """Kaydı döndürür (yoksa None). Kayıtta 'fresh' alanı TTL durumunu belirtir."""
+        path = self._path(self._key(url, selector))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupt scrape cache entry {path}: {e}")
+            return None
+        entry["fresh"] = (time.time() - entry.get("fetched_at", 0)) < self.ttl_seconds
+        try:
+            os.utime(path)  # LRU tahliyesi için erişim zamanını güncelle
+        except OSError:
+            pass
+        return entry
+
+    def put(self, url, selector, text, etag=None, last_modified=None):
+        key = self._key(url, selector)
+        entry = {
+            "url": url,
+            "selector": selector,
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Could not write scrape cache entry for {url}: {e}")
+            return
+        self._record("stores")
+        self._evict_if_needed()
+
+    def touch(self, url, selector):
+        """304 Not Modified sonrası kaydın tazelik süresini yeniler."""
+        entry = self.get(url, selector)
+        if entry:
+            self.put(url, selector, entry["text"], entry.get("etag"), entry.get("last_modified"))
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _record(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def record_hit(self):
+        self._record("hits")
+
+    def record_miss(self):
+        self._record("misses")
+
+    def record_revalidated(self):
+        self._record("revalidated")
+
+    def _evict_if_needed(self):
+        """
+        max_age_seconds'dan uzun süredir kullanılmayan kayıtları, ardından toplam boyut
+        max_bytes'ı aşıyorsa en uzun süredir kullanılmayanları siler.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            expire_before = time.time() - self.max_age_seconds
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_mtime < expire_before:
+                    try:
+                        os.remove(path)
+                        self.stats["evictions"] += 1
+                    except OSError:
+                        pass
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self.stats["evictions"] += 1
+                except OSError:
+                    pass
+            logger.info(f"Scrape cache evicted entries, size now {total} bytes.")
@@ -1,44 +1,335 @@
 import os
+import io
 import threading
 import logging
+import posixpath
 import http.server
-import socketserver
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, unquote
 from agents.base_agent import BaseAgent
+from agents.static_files import StaticFileCache, is_fingerprinted, IMMUTABLE_CACHE_CONTROL
 
 logger = logging.getLogger(__name__)
 
+# Oluşturulmakta olan sitelerin canlı önizlemesi: /_preview/<site_id>/
+PREVIEW_PREFIX = "/_preview/"
+
 class SimpleWebServerFactory:
-    def __init__(self, directory):
-        self.directory = directory
+    """
+    Çok siteli yönlendirme tablosu ve ona bağlı istek işleyici sınıfı.
+    İstek önce Host başlığına (ör. "<site_id>.localhost" veya kayıtlı bir alan adı), eşleşmezse
+    yol önekine ("/<site_id>/...") göre ilgili site klasörüne yönlendirilir.
+    Siteler çalışma sırasında eklenip kaldırılabilir. Dosyalar tüm sitelerin paylaştığı
+    StaticFileCache üzerinden sunulur. Önizlemeler diske yazılmaz; her istekte kayıtlı
+    kaynaktan üretilen HTML parçaları geldikçe gönderilir.
+    """
+    def __init__(self, file_cache=None):
+        self.sites = {} # site_id -> klasör
+        self.hosts = {} # host adı -> site_id
+        self.previews = {} # site_id -> HTML parçaları üreten iterator döndüren fonksiyon
+        self.file_cache = file_cache or StaticFileCache()
+        self._lock = threading.Lock()
+
+    def add_site(self, site_id, directory, hosts=()):
+        with self._lock:
+            self.sites[site_id] = os.path.abspath(directory)
+            for host in hosts:
+                self.hosts[host.lower()] = site_id
+
+    def remove_site(self, site_id):
+        with self._lock:
+            self.sites.pop(site_id, None)
+            for host in [h for h, s in self.hosts.items() if s == site_id]:
+                del self.hosts[host]
+
+    def set_preview(self, site_id, source):
+        with self._lock:
+            self.previews[site_id] = source
+
+    def remove_preview(self, site_id):
+        with self._lock:
+            self.previews.pop(site_id, None)
+
+    def get_preview(self, site_id):
+        with self._lock:
+            return self.previews.get(site_id)
+
+    def resolve(self, host_header, path):
+        """(site_id, klasör, site içi yol) döndürür; site bulunamazsa (None, None, path)."""
+        host = (host_header or "").split(":")[0].lower()
+        with self._lock:
+            site_id = self.hosts.get(host)
+            if site_id is None and host.endswith(".localhost"):
+                candidate = host[:-len(".localhost")]
+                site_id = candidate if candidate in self.sites else None
+            if site_id is not None and site_id in self.sites:
+                return site_id, self.sites[site_id], path
+            parts = path.lstrip("/").split("/", 1)
+            if parts[0] in self.sites:
+                return parts[0], self.sites[parts[0]], "/" + (parts[1] if len(parts) > 1 else "")
+        return None, None, path
+
+    def get_handler(self):
+        """Bu yönlendirme tablosuna bağlı istek işleyici sınıfını döndürür (sunucu her istekte örnekler)."""
+        factory = self
 
-    def get_handler(self, *args, **kwargs):
         class CustomHandler(http.server.SimpleHTTPRequestHandler):
+            # Yayın sırasında üretilen görsel varyantları (mimetypes her sürümde tanımıyor)
+            extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map,
+                              ".webp": "image/webp", ".avif": "image/avif"}
+
             def __init__(self, *args, **kwargs):
-                super().__init__(*args, directory=self.outer_self.directory, **kwargs)
-        CustomHandler.outer_self = self
+                # Kök dizin istek bazında translate_path içinde belirlenir
+                super().__init__(*args, directory=os.getcwd(), **kwargs)
+
+            def _route(self):
+                raw_path = urlsplit(self.path).path
+                site_id, site_dir, site_path = factory.resolve(self.headers.get("Host"), raw_path)
+                return site_id, site_dir, site_path, raw_path
+
+            def do_GET(self):
+                raw_path = urlsplit(self.path).path
+                if raw_path.startswith(PREVIEW_PREFIX):
+                    self._send_preview(raw_path[len(PREVIEW_PREFIX):].strip("/"))
+                    return
+                super().do_GET()
+
+            def _send_preview(self, site_id):
+                """
+                Önizlemeyi Content-Length olmadan gönderir: her parça üretildiği anda yazılır,
+                tarayıcı ilk bölümü (ve AI metninin ilk token'ını) tüm sayfa bitmeden gösterir.
+                Yanıt sonu bağlantı kapanışıyla belirlenir.
+                """
+                source = factory.get_preview(site_id)
+                if source is None:
+                    self.send_error(404, "Preview not found")
+                    return
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunks = source()
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(chunk.encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug(f"Preview client for '{site_id}' disconnected.")
+                finally:
+                    close = getattr(chunks, "close", None)
+                    if close:
+                        close() # Yarıda bırakılan akış üreticide temizlensin
+
+            def send_head(self):
+                site_id, site_dir, site_path, raw_path = self._route()
+                if site_dir is None:
+                    self.send_error(404, "Site not found")
+                    return None
+                # "/<site_id>" -> "/<site_id>/": göreli bağlantılar (style.css vb.) doğru çözülsün
+                if site_path == "/" and not raw_path.endswith("/"):
+                    self.send_response(301)
+                    self.send_header("Location", raw_path + "/")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return None
+                path = self.translate_path(self.path)
+                if os.path.isdir(path):
+                    index_path = os.path.join(path, "index.html")
+                    if not raw_path.endswith("/") or not os.path.isfile(index_path):
+                        return super().send_head() # Klasör yönlendirmesi / listeleme
+                    path = index_path
+                entry = factory.file_cache.lookup(path)
+                if entry is None:
+                    return super().send_head() # 404
+                return self._send_static(entry, path)
+
+            def _send_static(self, entry, path):
+                """
+                Önbellekteki dosyayı sunar: Accept-Encoding'e göre .br/.gz varyantı, ETag /
+                Last-Modified ile 304 ve tek aralıklı Range istekleri (206/416).
+                """
+                range_header = self.headers.get("Range")
+                encoding, rep = None, entry.identity
+                if not range_header: # Aralıklar yalnızca sıkıştırılmamış temsil üzerinden sunulur
+                    encoding, rep = self._negotiate_encoding(entry)
+
+                if self._not_modified(entry, rep):
+                    self.send_response(304)
+                    self._send_validators(entry, rep, path)
+                    self.end_headers()
+                    return None
+
+                start, end, status = 0, rep.size - 1, 200
+                if range_header and self._if_range_matches(entry, rep):
+                    byte_range = parse_range(range_header, rep.size)
+                    if byte_range is False:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{rep.size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return None
+                    if byte_range:
+                        (start, end), status = byte_range, 206
+
+                if rep.body is not None:
+                    body = io.BytesIO(rep.body[start:end + 1])
+                else:
+                    try:
+                        body = open(rep.path, "rb")
+                    except OSError:
+                        self.send_error(404, "File not found")
+                        return None
+                    body.seek(start)
+                self._send_count = end - start + 1
+
+                self.send_response(status)
+                self.send_header("Content-Type", self.guess_type(path))
+                if encoding:
+                    self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(end - start + 1))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{rep.size}")
+                self.send_header("Accept-Ranges", "bytes")
+                self._send_validators(entry, rep, path)
+                self.end_headers()
+                return body
+
+            def _send_validators(self, entry, rep, path):
+                self.send_header("ETag", rep.etag)
+                self.send_header("Last-Modified", entry.last_modified)
+                if is_fingerprinted(path):
+                    self.send_header("Cache-Control", IMMUTABLE_CACHE_CONTROL)
+                else:
+                    self.send_header("Cache-Control", "no-cache") # Her ziyarette ETag ile doğrulanır (304)
+                if entry.variants:
+                    self.send_header("Vary", "Accept-Encoding")
+
+            def _negotiate_encoding(self, entry):
+                accepted = set()
+                for item in self.headers.get("Accept-Encoding", "").split(","):
+                    name, _, params = item.strip().partition(";")
+                    params = params.replace(" ", "")
+                    if params.startswith("q="):
+                        try:
+                            if float(params[2:]) <= 0:
+                                continue
+                        except ValueError:
+                            continue
+                    accepted.add(name.strip().lower())
+                for encoding, rep in entry.variants.items():
+                    if encoding in accepted:
+                        return encoding, rep
+                return None, entry.identity
+
+            def _not_modified(self, entry, rep):
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match is not None:
+                    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+                    return "*" in tags or rep.etag in tags
+                if_modified_since = self.headers.get("If-Modified-Since")
+                if if_modified_since:
+                    try:
+                        return int(entry.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+                    except (TypeError, ValueError, IndexError, OverflowError):
+                        return False
+                return False
+
+            def _if_range_matches(self, entry, rep):
+                if_range = self.headers.get("If-Range")
+                return if_range is None or if_range.strip() in (rep.etag, entry.last_modified)
+
+            def copyfile(self, source, outputfile):
+                if isinstance(source, io.BytesIO):
+                    outputfile.write(source.getbuffer())
+                    return
+                # Büyük dosyalar kullanıcı alanına kopyalanmadan sendfile ile gönderilir
+                self.connection.sendfile(source, source.tell(), getattr(self, "_send_count", None))
+
+            def translate_path(self, path):
+                _, site_dir, site_path, _ = self._route()
+                if site_dir is None:
+                    return os.devnull
+                # SimpleHTTPRequestHandler.translate_path ile aynı normalleştirme; klasör dışına çıkılamaz
+                trailing_slash = site_path.endswith("/")
+                words = [w for w in posixpath.normpath(unquote(site_path)).split("/") if w]
+                # Site klasörü yayınlanmış bir sürüme sembolik bağ olabilir; istek başına bir kez
+                # çözülür, böylece yayın sırasında bile tek istek tek sürümden sunulur
+                result = os.path.realpath(site_dir)
+                for word in words:
+                    if os.path.dirname(word) or word in (os.curdir, os.pardir):
+                        continue
+                    result = os.path.join(result, word)
+                if trailing_slash:
+                    result += "/"
+                return result
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} - {format % args}")
+
         return CustomHandler
 
+def parse_range(header, size):
+    """
+    Tek aralıklı "bytes=" Range başlığını çözer: (start, end) döndürür. Sözdizimi geçersizse
+    veya birden fazla aralık istenmişse None (tüm dosya sunulur), karşılanamıyorsa False.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            suffix_length = int(last)
+            if suffix_length <= 0:
+                return False
+            return max(0, size - suffix_length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
 class ServerAgent(BaseAgent):
-    def __init__(self, name="Server Agent", port=8000):
+    """
+    Tüm siteleri tek bir portta ve tek süreçte sunan çok siteli sunucu.
+    ThreadingHTTPServer her isteği ayrı bir thread'de işler; siteler execute() ile eklenir,
+    remove_site() ile sunucu yeniden başlatılmadan kaldırılır.
+    """
+    def __init__(self, name="Server Agent", port=None):
         super().__init__(name)
-        self.port = port
+        self.port = port or int(os.getenv("SERVER_PORT", "8000"))
         self.httpd_server = None
         self.server_thread = None
-        self.site_folder_to_serve = None
-
-    def _start_server(self, site_folder, port):
-        handler_factory = SimpleWebServerFactory(site_folder)
-        try:
-            with socketserver.TCPServer(("", port), handler_factory.get_handler) as httpd:
-                self.httpd_server = httpd
-                self.site_folder_to_serve = site_folder
-                logger.info(f"{self.name}: Serving on port {port} from {site_folder}")
-                httpd.serve_forever()
-        except OSError as e:
-            logger.error(f"{self.name}: Port {port} in use: {e}")
-            self.httpd_server = None
-        except Exception as e:
-            logger.error(f"{self.name}: Server error: {e}", exc_info=True)
+        self.handler_factory = SimpleWebServerFactory()
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self.server_thread and self.server_thread.is_alive():
+                return True
+            try:
+                self.httpd_server = http.server.ThreadingHTTPServer(("", self.port), self.handler_factory.get_handler())
+            except OSError as e:
+                logger.error(f"{self.name}: Port {self.port} in use: {e}")
+                self.httpd_server = None
+                return False
+            self.httpd_server.daemon_threads = True
+            self.server_thread = threading.Thread(
+                target=self.httpd_server.serve_forever,
+                name=f"ServerThread-Port{self.port}",
+                daemon=True
+            )
+            self.server_thread.start()
+            logger.info(f"{self.name}: Serving sites on port {self.port}")
+            return True
 
     def execute(self, task):
         site_folder = task.get("site_folder")
@@ -46,17 +337,33 @@ class ServerAgent(BaseAgent):
             logger.error(f"{self.name}: Invalid site folder: {site_folder}")
             return {"success": False, "message": "Invalid site folder"}
 
-        if self.server_thread and self.server_thread.is_alive():
-            return {"success": False, "message": f"Server already running on port {self.port}"}
+        site_id = task.get("site_id") or os.path.basename(os.path.normpath(site_folder))
+        if not self._ensure_started():
+            return {"success": False, "message": f"Could not start server on port {self.port}"}
+
+        self.handler_factory.add_site(site_id, site_folder, hosts=task.get("hosts", ()))
+        logger.info(f"{self.name}: Site '{site_id}' served from {site_folder}")
+        return {"success": True, "url": f"http://localhost:{self.port}/{site_id}/", "site_id": site_id}
+
+    def add_preview(self, site_id, source):
+        """
+        site_id için önizleme kaynağını (çağrıldığında HTML parçaları üreten fonksiyon)
+        kaydeder ve önizleme URL'ini döndürür; sunucu başlatılamazsa None.
+        """
+        if not self._ensure_started():
+            return None
+        self.handler_factory.set_preview(site_id, source)
+        return f"http://localhost:{self.port}{PREVIEW_PREFIX}{site_id}/"
+
+    def remove_preview(self, site_id):
+        self.handler_factory.remove_preview(site_id)
+
+    def cache_stats(self):
+        return self.handler_factory.file_cache.snapshot()
 
-        self.server_thread = threading.Thread(
-            target=self._start_server,
-            args=(site_folder, self.port),
-            name=f"ServerThread-Port{self.port}",
-            daemon=True
-        )
-        self.server_thread.start()
-        return {"success": True, "url": f"http://localhost:{self.port}"}
+    def remove_site(self, site_id):
+        self.handler_factory.remove_site(site_id)
+        logger.info(f"{self.name}: Site '{site_id}' removed from server on port {self.port}")
 
     def stop_server(self):
         if self.httpd_server:
@@ -66,4 +373,3 @@ class ServerAgent(BaseAgent):
             logger.info(f"{self.name}: Server stopped on port {self.port}")
             self.httpd_server = None
             self.server_thread = None
-            self.site_folder_to_serve = None
\ No newline at end of file
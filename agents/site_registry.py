@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# JSON olarak saklanan sütunlar
+_JSON_FIELDS = ("spec", "banner_images", "manifest")
+_FIELDS = ("folder", "url", "port", "spec", "banner_images", "manifest", "last_build_at")
+
+
+class SiteRegistry:
+    """
+    Sitelerin kalıcı kaydı (SQLite, WAL modu): spec, build manifest'i, port ve son build zamanı.
+    Yeniden başlatmada ManagerAgent mevcut çıktılara bu kayıt üzerinden yeniden bağlanır.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.getenv("SITE_REGISTRY_DB", "output/site_registry.db")
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._local = threading.local()  # sqlite3 bağlantıları thread'ler arasında paylaşılamaz
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS sites (
+                topic TEXT PRIMARY KEY,
+                folder TEXT,
+                url TEXT,
+                port INTEGER,
+                spec TEXT,
+                banner_images TEXT,
+                manifest TEXT,
+                last_build_at REAL,
+                updated_at REAL NOT NULL
+            )""")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # WAL: okuyucular yazarları beklemez; eşzamanlı build'ler kayıt güncellerken engellenmez
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_dict(self, row):
+        site = dict(row)
+        for field in _JSON_FIELDS:
+            if site.get(field) is not None:
+                site[field] = json.loads(site[field])
+        return site
+
+    def upsert_site(self, topic, **fields):
+        """Verilen alanları yazar; verilmeyen alanlar (kayıt varsa) korunur."""
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown site registry fields: {', '.join(sorted(unknown))}")
+        values = {key: (json.dumps(value, ensure_ascii=False) if key in _JSON_FIELDS and value is not None else value)
+                  for key, value in fields.items()}
+        values["updated_at"] = time.time()
+        columns = ", ".join(["topic"] + list(values))
+        placeholders = ", ".join(["?"] * (len(values) + 1))
+        updates = ", ".join(f"{key} = excluded.{key}" for key in values)
+        try:
+            with self._conn() as conn:
+                conn.execute(f"INSERT INTO sites ({columns}) VALUES ({placeholders}) "
+                             f"ON CONFLICT(topic) DO UPDATE SET {updates}",
+                             [topic] + list(values.values()))
+        except sqlite3.Error as e:
+            logger.error(f"Could not save site '{topic}' to registry: {e}")
+
+    def get_site(self, topic):
+        row = self._conn().execute("SELECT * FROM sites WHERE topic = ?", (topic,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_sites(self):
+        return [self._row_to_dict(row) for row in self._conn().execute("SELECT * FROM sites ORDER BY topic")]
+
+    def get_manifest(self, topic):
+        row = self._conn().execute("SELECT manifest FROM sites WHERE topic = ?", (topic,)).fetchone()
+        return json.loads(row["manifest"]) if row and row["manifest"] else None
+
+    def delete_site(self, topic):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM sites WHERE topic = ?", (topic,))
@@ -0,0 +1,155 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_STAGING_SUFFIX = ".staging"
+_MANIFEST_SUFFIX = ".manifest.json"
+
+
+class SiteReleases:
+    """
+    Sürümlü yayın. Her build <root>/<site_id>/<sürüm> altında ayrı bir klasöre yazılır ve
+    sitenin canlı yolu (ör. output/sites/<site_id>) bu klasörü gösteren bir sembolik bağdır.
+    Yayın, bağın os.replace ile tek adımda değiştirilmesidir: okuyucular ya eski ya yeni
+    sürümün tamamını görür. Son `keep` sürüm anında geri dönüş için saklanır. Her sürümün
+    build manifest'i sunulan klasörün dışında, <sürüm>.manifest.json olarak yanında tutulur;
+    geri dönüşte canlı sürümü tarif eden manifest buradan okunur.
+    """
+
+    def __init__(self, root=None, keep=None):
+        self.root = root or os.getenv("SITE_RELEASES_DIR", "output/releases")
+        self.keep = keep or int(os.getenv("SITE_KEEP_RELEASES", "5"))
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, site_id):
+        with self._locks_guard:
+            return self._locks.setdefault(site_id, threading.Lock())
+
+    def _site_root(self, site_id):
+        return os.path.join(self.root, site_id)
+
+    def versions(self, site_id):
+        """Yayınlanmış sürümler, eskiden yeniye."""
+        site_root = self._site_root(site_id)
+        if not os.path.isdir(site_root):
+            return []
+        return sorted(name for name in os.listdir(site_root)
+                      if not name.endswith(_STAGING_SUFFIX) and os.path.isdir(os.path.join(site_root, name)))
+
+    def current(self, live_path):
+        """Canlı yolun gösterdiği sürümün adı (sürümlü yayına geçmemiş sitelerde None)."""
+        if not os.path.islink(live_path):
+            return None
+        return os.path.basename(os.path.realpath(live_path))
+
+    def stage(self, site_id, live_path=None):
+        """
+        Yeni bir hazırlık klasörü oluşturur ve yolunu döndürür. live_path verilirse canlı
+        sürümün dosyaları hardlink ile taşınır; değişmeyen dosyalar kopyalanmaz. Yazıcılar
+        dosyaları os.replace ile değiştirdiği için paylaşılan dosyalar yerinde bozulmaz.
+        """
+        # Sürüm adları zamana göre sıralanır (mikrosaniye hassasiyetinde)
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        staging_dir = os.path.join(self._site_root(site_id), version + _STAGING_SUFFIX)
+        os.makedirs(staging_dir)
+        if live_path and os.path.isdir(live_path):
+            source_root = os.path.realpath(live_path)
+            for root, _, files in os.walk(source_root):
+                target_root = os.path.join(staging_dir, os.path.relpath(root, source_root))
+                os.makedirs(target_root, exist_ok=True)
+                for file_name in files:
+                    source, target = os.path.join(root, file_name), os.path.join(target_root, file_name)
+                    try:
+                        os.link(source, target)
+                    except OSError:
+                        shutil.copy2(source, target)
+        return staging_dir
+
+    def discard(self, staging_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def manifest(self, site_id, version):
+        """Sürümle birlikte kaydedilmiş build manifest'i (yoksa None)."""
+        try:
+            with open(os.path.join(self._site_root(site_id), version + _MANIFEST_SUFFIX), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, site_id, staging_dir, live_path, manifest=None):
+        """
+        Hazırlık klasörünü sürüm olarak kaydeder, canlı yolu ona çevirir ve sürüm adını döndürür.
+        manifest verilirse sürümün yanına yazılır (bağ değişmeden önce).
+        """
+        version_dir = staging_dir[:-len(_STAGING_SUFFIX)]
+        if manifest is not None:
+            with open(version_dir + _MANIFEST_SUFFIX, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        os.rename(staging_dir, version_dir)
+        with self._lock_for(site_id):
+            self._swap(site_id, live_path, version_dir)
+            self._prune(site_id, live_path)
+        version = os.path.basename(version_dir)
+        logger.info(f"Published {site_id} version {version}.")
+        return version
+
+    def rollback(self, site_id, live_path, version=None):
+        """Canlı yolu verilen (verilmezse bir önceki) sürüme çevirir; sürüm adını veya None döndürür."""
+        with self._lock_for(site_id):
+            versions = self.versions(site_id)
+            if version is None:
+                current = self.current(live_path)
+                older = [v for v in versions if v < current] if current else versions[:-1]
+                version = older[-1] if older else None
+            if version is None or version not in versions:
+                logger.error(f"No release to roll back to for {site_id} (requested: {version}).")
+                return None
+            self._swap(site_id, live_path, os.path.join(self._site_root(site_id), version))
+        logger.info(f"Rolled back {site_id} to version {version}.")
+        return version
+
+    def _swap(self, site_id, live_path, version_dir):
+        os.makedirs(os.path.dirname(live_path) or ".", exist_ok=True)
+        tmp_link = f"{live_path}.{os.getpid()}.{threading.get_ident()}.link"
+        try:
+            os.symlink(os.path.abspath(version_dir), tmp_link, target_is_directory=True)
+        except (OSError, NotImplementedError) as e:
+            # Sembolik bağ desteklenmiyorsa (ör. yetkisiz Windows) kopya + yeniden adlandırma ile değiştirilir;
+            # iki rename arasında kısa bir boşluk kalır
+            logger.warning(f"Symlinks unavailable ({e}), publishing {site_id} by directory rename.")
+            self._rename_swap(live_path, version_dir)
+            return
+        if os.path.isdir(live_path) and not os.path.islink(live_path):
+            # Sürümlü yayından önceki düz klasör bir kez sürüm olarak saklanır
+            legacy_dir = os.path.join(self._site_root(site_id), "00000000000000000000-legacy")
+            os.makedirs(self._site_root(site_id), exist_ok=True)
+            if os.path.exists(legacy_dir):
+                shutil.rmtree(legacy_dir)
+            os.rename(live_path, legacy_dir)
+        os.replace(tmp_link, live_path)
+
+    def _rename_swap(self, live_path, version_dir):
+        incoming = f"{live_path}.{os.getpid()}.incoming"
+        outgoing = f"{live_path}.{os.getpid()}.outgoing"
+        shutil.copytree(version_dir, incoming)
+        if os.path.exists(live_path):
+            os.rename(live_path, outgoing)
+        os.rename(incoming, live_path)
+        shutil.rmtree(outgoing, ignore_errors=True)
+
+    def _prune(self, site_id, live_path):
+        current = self.current(live_path)
+        versions = self.versions(site_id)
+        for version in versions[:max(0, len(versions) - self.keep)]:
+            if version != current:
+                version_dir = os.path.join(self._site_root(site_id), version)
+                shutil.rmtree(version_dir, ignore_errors=True)
+                if os.path.exists(version_dir + _MANIFEST_SUFFIX):
+                    os.remove(version_dir + _MANIFEST_SUFFIX)
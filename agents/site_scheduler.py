@@ -0,0 +1,183 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class ScheduledJob:
+    """
+    Tekrarlanan bir iş. kind: "interval" (every saniye), "daily" (at "HH:MM") veya
+    "weekly" (weekday + at). key aynı siteye ait çalıştırmaların çakışmasını önlemek için kullanılır.
+    """
+
+    def __init__(self, key, func, kind, every=None, at=None, weekday=None, tags=()):
+        self.key = key
+        self.func = func
+        self.kind = kind
+        self.every = every
+        self.at = at
+        self.weekday = weekday
+        self.tags = set(tags)
+        self.cancelled = False
+        self.next_run = None  # Jitter'sız planlanan zaman (epoch)
+
+    def compute_next_run(self, after):
+        if self.kind == "interval":
+            base = self.next_run if self.next_run is not None else after
+            next_run = base + self.every
+            # Uzun bir gecikmeden sonra kaçırılan çalıştırmalar birikmesin
+            while next_run <= after:
+                next_run += self.every
+            return next_run
+
+        hour, minute = (int(part) for part in self.at.split(":"))
+        now = datetime.fromtimestamp(after)
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if self.kind == "weekly":
+            candidate += timedelta(days=(self.weekday - candidate.weekday()) % 7)
+            step = timedelta(days=7)
+        else:
+            step = timedelta(days=1)
+        while candidate.timestamp() <= after:
+            candidate += step
+        return candidate.timestamp()
+
+
+class SiteScheduler:
+    """
+    Heap tabanlı zamanlayıcı. Zamanlayıcı thread'i bir sonraki işin zamanına kadar uyur
+    (yeni iş eklenirse uyanır), işleri bir worker havuzuna gönderir ve kendisi hiçbir işi
+    çalıştırmaz. Binlerce sitenin aynı anda tetiklenmemesi için her çalıştırmaya rastgele
+    jitter eklenir; aynı key için önceki çalıştırma sürüyorsa yeni çalıştırma atlanır.
+    """
+
+    def __init__(self, max_workers=None, jitter_seconds=None):
+        self.max_workers = max_workers or int(os.getenv("SCHEDULER_WORKERS", "4"))
+        self.jitter_seconds = jitter_seconds if jitter_seconds is not None else float(os.getenv("SCHEDULER_JITTER", "30"))
+        self._heap = []  # (run_at, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running_keys = set()
+        self._executor = None
+        self._thread = None
+        self._stopping = False
+        self.stats = {"dispatched": 0, "completed": 0, "failed": 0, "skipped_overlap": 0,
+                      "last_lag_seconds": 0.0, "max_lag_seconds": 0.0, "in_flight": 0}
+
+    # --- İş ekleme / kaldırma ---
+    def every(self, key, func, seconds, tags=()):
+        return self._add(ScheduledJob(key, func, "interval", every=seconds, tags=tags))
+
+    def daily(self, key, func, at, tags=()):
+        return self._add(ScheduledJob(key, func, "daily", at=at, tags=tags))
+
+    def weekly(self, key, func, weekday, at, tags=()):
+        return self._add(ScheduledJob(key, func, "weekly", at=at, weekday=WEEKDAYS.index(weekday), tags=tags))
+
+    def _add(self, job):
+        job.next_run = job.compute_next_run(time.time())
+        with self._cond:
+            self._push(job)
+            self._cond.notify()
+        return job
+
+    def _push(self, job):
+        # Jitter yalnızca gerçek tetiklenme zamanına eklenir; bir sonraki plan jitter'sız zamandan hesaplanır
+        run_at = job.next_run + (random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0)
+        heapq.heappush(self._heap, (run_at, next(self._seq), job))
+
+    def cancel(self, tag):
+        """Verilen etikete (ör. site adı) sahip işleri iptal eder; heap'ten tembel olarak düşerler."""
+        with self._cond:
+            for _, _, job in self._heap:
+                if tag in job.tags or job.key == tag:
+                    job.cancelled = True
+
+    # --- Çalıştırma ---
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ScheduledJob")
+            self._thread = threading.Thread(target=self._loop, name="SchedulerThread", daemon=True)
+            self._thread.start()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("Scheduler thread did not stop in time.")
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._thread = None
+        self._executor = None
+
+    def _loop(self):
+        logger.info("Scheduler loop started.")
+        while True:
+            with self._cond:
+                while not self._stopping and (not self._heap or self._heap[0][0] > time.time()):
+                    # Bir sonraki işin zamanına kadar (veya yeni iş/stop sinyaline kadar) uyu
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    break
+                run_at, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                job.next_run = job.compute_next_run(max(time.time(), job.next_run))
+                self._push(job)
+            self._dispatch(job, run_at)
+        logger.info("Scheduler loop stopped.")
+
+    def _dispatch(self, job, run_at):
+        lag = max(0.0, time.time() - run_at)
+        with self._cond:
+            self.stats["last_lag_seconds"] = lag
+            self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+            if job.key in self._running_keys:
+                self.stats["skipped_overlap"] += 1
+                logger.warning(f"Previous run for '{job.key}' still in progress, skipping this run.")
+                return
+            self._running_keys.add(job.key)
+            self.stats["dispatched"] += 1
+            self.stats["in_flight"] += 1
+        self._executor.submit(self._run_job, job)
+
+    def _run_job(self, job):
+        try:
+            job.func()
+            outcome = "completed"
+        except Exception as e:
+            logger.error(f"Scheduled job for '{job.key}' failed: {e}", exc_info=True)
+            outcome = "failed"
+        with self._cond:
+            self._running_keys.discard(job.key)
+            self.stats[outcome] += 1
+            self.stats["in_flight"] -= 1
+
+    def metrics(self):
+        """Gecikme (lag) ve kuyruk derinliği metrikleri."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["scheduled_jobs"] = sum(1 for _, _, job in self._heap if not job.cancelled)
+            due = time.time()
+            stats["queue_depth"] = sum(1 for run_at, _, job in self._heap if run_at <= due and not job.cancelled)
+            stats["queue_depth"] += stats["in_flight"]
+        return stats
@@ -0,0 +1,222 @@
+import os
+import re
+import stat
+import gzip
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from email.utils import formatdate
+
+try:
+    import brotli
+except ImportError:  # brotli isteğe bağlı; kurulu değilse yalnızca gzip varyantı üretilir
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml"}
+MIN_COMPRESS_BYTES = 256
+# (Content-Encoding, kardeş dosya uzantısı); Accept-Encoding eşleştirmesinde bu sıra tercih edilir
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# "style.3f9a1c0b7e2d.css" biçimindeki içerik özetli (parmak izli) dosya adları
+FINGERPRINT_PATTERN = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+# Parmak izli dosyaların içeriği hiç değişmez; tarayıcı ve CDN'ler bir yıl boyunca doğrulamadan kullanır
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Gövdesi bellekte tutulmayan kayıtlar için de LRU bütçesinden düşülen sabit maliyet
+_ENTRY_OVERHEAD = 256
+
+
+def _write_bytes_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def fingerprinted_name(name, data):
+    """name'e içeriğin SHA-256 özetini ekler: "style.css" -> "style.<12 hane>.css"."""
+    return name_for_digest(name, hashlib.sha256(data).hexdigest())
+
+
+def name_for_digest(name, digest):
+    """Özeti bilinen (ör. BlobStore'dan gelen) içerik için parmak izli ad."""
+    stem, ext = os.path.splitext(os.path.basename(name))
+    return f"{stem}.{digest[:12]}{ext}"
+
+
+def is_fingerprinted(path):
+    return FINGERPRINT_PATTERN.search(path) is not None
+
+
+def prune_unreferenced(site_folder, page="index.html"):
+    """
+    Sayfanın (ve sayfadan bağlanan parmak izli stil dosyalarının) artık anmadığı parmak izli
+    dosyaları ve .gz/.br kardeşlerini siler. Yeni sürüm önceki sürümden hardlink ile
+    başladığı için eski CSS ve görsel varyantları aksi halde her sürüme taşınırdı.
+    Silinen dosya adlarını döndürür.
+    """
+    with open(os.path.join(site_folder, page), "r", encoding="utf-8") as f:
+        referenced_text = f.read()
+    sidecars = tuple(suffix for _, suffix in ENCODINGS)
+    names = [name for name in os.listdir(site_folder) if os.path.isfile(os.path.join(site_folder, name))]
+    fingerprinted = [name for name in names if not name.endswith(sidecars) and is_fingerprinted(name)]
+    # Stil dosyaları da görsellere bağlanabilir (url(...)); anılan CSS'lerin içeriği metne eklenir
+    for name in fingerprinted:
+        if name.endswith(".css") and name in referenced_text:
+            with open(os.path.join(site_folder, name), "r", encoding="utf-8", errors="replace") as f:
+                referenced_text += f.read()
+
+    removed = []
+    for name in fingerprinted:
+        if name in referenced_text:
+            continue
+        for candidate in (name,) + tuple(name + suffix for suffix in sidecars):
+            if candidate in names:
+                os.remove(os.path.join(site_folder, candidate))
+                removed.append(candidate)
+    if removed:
+        logger.info(f"Pruned {len(removed)} unreferenced file(s) from {site_folder}.")
+    return removed
+
+
+def precompress_file(path):
+    """
+    Yayın sırasında path için .gz (ve brotli kuruluysa .br) kardeş dosyalarını üretir.
+    Kaynak dosyadan sonra yazıldıkları için sunucu onları yalnızca güncel olduklarında kullanır.
+    Üretilen Content-Encoding adlarını döndürür.
+    """
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+
+    compressed = {}
+    if len(data) >= MIN_COMPRESS_BYTES:
+        compressed["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+        if brotli is not None:
+            compressed["br"] = brotli.compress(data, quality=11)
+
+    written = []
+    for encoding, suffix in ENCODINGS:
+        payload = compressed.get(encoding)
+        if payload is not None and len(payload) < len(data):
+            _write_bytes_atomic(path + suffix, payload)
+            written.append(encoding)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)  # Eski varyant yeni içerikle eşleşmez
+    return written
+
+
+def precompress_site(site_folder):
+    """Site klasöründeki tüm sıkıştırılabilir dosyalar için varyant üretir."""
+    for root, _, files in os.walk(site_folder):
+        for file_name in files:
+            precompress_file(os.path.join(root, file_name))
+
+
+class Representation:
+    """Bir dosyanın tek bir kodlamadaki hali: disk yolu, boyut, güçlü ETag ve (küçükse) gövde."""
+
+    def __init__(self, path, size, etag, body=None):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.body = body
+
+
+class StaticFile:
+    def __init__(self, key, mtime, identity, variants):
+        self.key = key
+        self.mtime = mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.identity = identity
+        self.variants = variants  # Content-Encoding -> Representation
+
+    @property
+    def cost(self):
+        return _ENTRY_OVERHEAD + sum(len(rep.body) for rep in [self.identity, *self.variants.values()]
+                                     if rep.body is not None)
+
+
+class StaticFileCache:
+    """
+    Sık istenen dosyaların bellek içi LRU önbelleği. Kayıtlar dosyanın (ve varsa .br/.gz
+    varyantlarının) mtime/boyutuyla doğrulanır; dosya değişince bir sonraki istekte yeniden yüklenir.
+    max_file_bytes'tan büyük dosyaların gövdesi tutulmaz (sunucu onları sendfile ile gönderir),
+    yalnızca ETag'leri saklanır.
+    """
+
+    def __init__(self, max_bytes=None, max_file_bytes=None):
+        self.max_bytes = max_bytes or int(os.getenv("STATIC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.max_file_bytes = max_file_bytes or int(os.getenv("STATIC_CACHE_MAX_FILE_BYTES", str(1024 * 1024)))
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def lookup(self, path):
+        """Dosyanın StaticFile kaydını döndürür; normal bir dosya değilse None."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        sidecars = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                sidecar_st = os.stat(path + suffix)
+            except OSError:
+                continue
+            if sidecar_st.st_mtime_ns >= st.st_mtime_ns:  # Kaynaktan eski varyant bayattır
+                sidecars[encoding] = sidecar_st
+        key = (st.st_mtime_ns, st.st_size) + tuple(
+            (encoding, s.st_mtime_ns, s.st_size) for encoding, s in sidecars.items())
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(path)
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+
+        try:
+            entry = StaticFile(key, st.st_mtime, self._load(path, st.st_size, ""),
+                               {encoding: self._load(path + suffix, sidecars[encoding].st_size, f"-{encoding}")
+                                for encoding, suffix in ENCODINGS if encoding in sidecars})
+        except OSError as e:
+            logger.warning(f"Could not read static file {path}: {e}")
+            return None
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= old.cost
+            self._entries[path] = entry
+            self._size += entry.cost
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.cost
+                self.stats["evictions"] += 1
+        return entry
+
+    def _load(self, path, size, etag_suffix):
+        digest = hashlib.sha256()
+        if size <= self.max_file_bytes:
+            with open(path, "rb") as f:
+                body = f.read()
+            digest.update(body)
+            size = len(body)
+        else:
+            body = None
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return Representation(path, size, f'"{digest.hexdigest()[:32]}{etag_suffix}"', body)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._size)
@@ -0,0 +1,396 @@
+# benchmark.py
+"""
+Site oluşturma hattı için benchmark. Dış bağımlılık olmadan (çevrimdışı) çalışır: AI
+sağlayıcıları sahte fonksiyonlarla, web kazıma ve görsel kaynakları yerel bir HTTP
+sunucusuyla değiştirilir. Artan boyutta (bölüm sayısı) sentetik site spec'leri oluşturulur;
+aşama başına gecikme yüzdelikleri, dakika başına site ve bellek tepe değeri raporlanır.
+
+Kullanım:
+    python benchmark.py                                   # varsayılan boyutlar: 2,8,32 bölüm
+    python benchmark.py --sizes 4,16 --sites 10
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --compare bench_baseline.json --tolerance 0.25   # gerilemede çıkış kodu 1
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import functools
+import statistics
+import tracemalloc
+import http.client
+import http.server
+import logging
+from urllib.parse import urlsplit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# 1x1 PNG; Pillow yoksa sahte görsel kaynağı bunu döndürür
+_TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360f8cfc0f01f0005000201a3e3d3b60000000049454e44ae426082")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeOrigin:
+    """Kazıma sayfaları (/page/<ad>.html) ve görseller (/image/<ad>.jpg) sunan yerel sunucu."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.image_bytes, self.image_type = self._make_image()
+        self.port = _free_port()
+        origin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(origin.latency)
+                path = urlsplit(self.path).path
+                if path.startswith("/page/"):
+                    paragraphs = "".join(f"<p>{path} paragraf {i}: " + "içerik " * 40 + "</p>" for i in range(8))
+                    body, content_type = f"<html><body>{paragraphs}</body></html>".encode("utf-8"), "text/html; charset=utf-8"
+                elif path.startswith("/image/"):
+                    body, content_type = origin.image_bytes, origin.image_type
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, name="FakeOrigin", daemon=True).start()
+
+    @staticmethod
+    def _make_image():
+        try:
+            from PIL import Image
+        except ImportError:
+            return _TINY_PNG, "image/png"
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), (40, 90, 140)).save(buffer, format="JPEG", quality=85)
+        return buffer.getvalue(), "image/jpeg"
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def install_fake_providers(latency):
+    """provider_router'daki tüm sağlayıcıları gecikmeli sahte yanıtlarla değiştirir."""
+    from agents import provider_router
+
+    def fake_ask(prompt, purpose="default"):
+        time.sleep(latency)
+        return f"[{purpose}] " + " ".join(prompt.split()[:12]) + " — " + "sentetik içerik " * 30
+
+    def fake_stream(prompt, purpose="default"):
+        yield fake_ask(prompt, purpose)
+
+    def fake_batch(prompts, purpose="default"):
+        return [fake_ask(prompt, purpose) for prompt in prompts]
+
+    for name in provider_router.PROVIDERS:
+        provider_router.PROVIDERS[name] = fake_ask
+        provider_router.STREAMING_PROVIDERS[name] = fake_stream
+    for name in provider_router.BATCH_PROVIDERS:
+        provider_router.BATCH_PROVIDERS[name] = fake_batch
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def instrument(self, owner, method_name, stage):
+        """owner.method_name çağrılarının süresini stage altında kaydeder."""
+        original = getattr(owner, method_name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(owner, method_name, timed)
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = (len(ordered) - 1) * pct / 100
+    low, high = int(index), min(int(index) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def summarize(samples):
+    return {stage: {"count": len(values),
+                    "mean_ms": statistics.fmean(values) * 1000,
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p90_ms": percentile(values, 90) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000}
+            for stage, values in sorted(samples.items())}
+
+
+def make_spec(size, site_index, origin):
+    """size bölümlü sentetik spec; bölüm türleri sırayla dönüşür."""
+    sections = []
+    for i in range(size):
+        kind = i % 6
+        title = f"Bölüm {i + 1}"
+        if kind == 0:
+            sections.append({"title": title, "type": "text", "source": "local",
+                             "content": "Yerel içerik. " * 20})
+        elif kind == 1:
+            sections.append({"title": title, "type": "list", "items": [f"Madde {j}" for j in range(6)]})
+        elif kind == 2:
+            sections.append({"title": title, "type": "text", "source": "web_scrape",
+                             "url": origin.url(f"/page/site{site_index}-{i}.html"), "selector": "p"})
+        elif kind == 3:
+            sections.append({"title": title, "type": "text", "source": "ai", "prompt": f"Site {site_index} bölüm {i}"})
+        elif kind == 4:
+            sections.append({"title": title, "type": "images", "count": 2, "image_topic": f"site {site_index} {i}"})
+        else:
+            sections.append({"title": title, "type": "form"})
+    return {"title": f"Benchmark Sitesi {site_index}", "main_heading": f"Benchmark {site_index}",
+            "theme": "futuristic" if site_index % 2 else "basic", "sections": sections}
+
+
+_STYLESHEET_LINK = re.compile(r'<link[^>]+href="([^"]+\.css)"', re.IGNORECASE)
+
+
+def _timed_get(timer, stage, connection, path):
+    started = time.perf_counter()
+    connection.request("GET", path, headers={"Accept-Encoding": "gzip, br"})
+    response = connection.getresponse()
+    response.read()
+    timer.record(stage, time.perf_counter() - started)
+
+
+def measure_serving(timer, sites, requests_per_site):
+    """
+    Her sitenin sayfası ("serve") ve parmak izli stil dosyası ("serve_asset") için
+    keep-alive bağlantı üzerinden istek süresini ölçer.
+    """
+    for site in sites:
+        parts = urlsplit(site["url"])
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+        try:
+            # Stil dosyasının adı sıkıştırılmamış sayfadan bir kez okunur (ölçüme dahil değil)
+            connection.request("GET", parts.path)
+            link = _STYLESHEET_LINK.search(connection.getresponse().read().decode("utf-8", "replace"))
+            stylesheet = parts.path + link.group(1) if link else None
+            for _ in range(requests_per_site):
+                _timed_get(timer, "serve", connection, parts.path)
+                if stylesheet:
+                    _timed_get(timer, "serve_asset", connection, stylesheet)
+        finally:
+            connection.close()
+
+
+def build_manager():
+    from agents.manager_agent import ManagerAgent
+    from agents.design_agent import DesignAgent
+    from agents.dynamic_agent import DynamicAgent
+    from agents.backend_agent import BackendAgent
+    from agents.editor_agent import EditorAgent
+    from agents.reviewer_agent import ReviewerAgent
+
+    manager = ManagerAgent()
+    for agent in (DesignAgent(), DynamicAgent(), BackendAgent(), EditorAgent(), ReviewerAgent()):
+        manager.add_agent(agent)
+    return manager
+
+
+def run(args):
+    # Yapılandırma modüller import edilmeden önce ayarlanır
+    os.environ.setdefault("SERVER_PORT", str(_free_port()))
+    os.environ.setdefault("AI_CACHE_ENABLED", "0")  # Her prompt gerçekten "sağlayıcıya" gider
+    os.environ.setdefault("AI_PROVIDER_CHAIN", "openai")
+
+    from agents.editor_agent import EditorAgent
+    from agents.design_agent import DesignAgent
+    from agents.reviewer_agent import ReviewerAgent
+    from agents.manager_agent import ManagerAgent
+    logging.getLogger().setLevel(logging.WARNING)  # Ajan logları ölçümü boğmasın
+
+    origin = FakeOrigin(latency=args.scrape_latency)
+    install_fake_providers(args.provider_latency)
+    EditorAgent._find_relevant_images = lambda self, topic, num_images=1: [
+        origin.url(f"/image/{topic.replace(' ', '_')}-{i}.jpg") for i in range(num_images)]
+
+    timer = StageTimer()
+    timer.instrument(ManagerAgent, "create_website", "create_website")
+    timer.instrument(EditorAgent, "execute", "editor")
+    timer.instrument(DesignAgent, "render_page", "design")
+    timer.instrument(ReviewerAgent, "execute", "reviewer")
+
+    manager = build_manager()
+    results = {"meta": {"sizes": args.sizes, "sites": args.sites, "provider_latency": args.provider_latency,
+                        "scrape_latency": args.scrape_latency, "python": sys.version.split()[0]},
+               "sizes": {}}
+    try:
+        for size in args.sizes:
+            # Süreler tracemalloc kapalıyken ölçülür; izleme bellek ayıran kodu (HTML ayrıştırma,
+            # Pillow, JSON) birkaç kat yavaşlatır ve yüzdelikleri bozar
+            timer.reset()
+            built = []
+            started = time.perf_counter()
+            for site_index in range(args.sites):
+                topic = f"Bench {size} {site_index}"
+                site = manager.create_website(topic, make_spec(size, site_index, origin))
+                if site:
+                    built.append(site)
+            elapsed = time.perf_counter() - started
+            measure_serving(timer, built, args.requests)
+            stages = summarize(timer.samples)
+
+            # Bellek tepe değeri ayrı, zamanlanmayan bir build ile ölçülür
+            tracemalloc.start()
+            manager.create_website(f"Bench {size} memory", make_spec(size, args.sites, origin))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results["sizes"][str(size)] = {
+                "sites_built": len(built),
+                "sites_per_minute": len(built) / elapsed * 60 if elapsed > 0 else 0.0,
+                "peak_memory_mb": peak / (1024 * 1024),
+                "stages": stages,
+            }
+        if resource is not None:
+            # Linux'ta KiB, macOS'ta bayt cinsindendir
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            results["meta"]["max_rss_mb"] = maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    finally:
+        manager.stop_server()
+        manager.image_pipeline.shutdown()
+        origin.close()
+    return results
+
+
+def print_report(results):
+    for size, data in results["sizes"].items():
+        print(f"\n== {size} bölüm: {data['sites_built']} site, {data['sites_per_minute']:.1f} site/dk, "
+              f"bellek tepe {data['peak_memory_mb']:.1f} MiB")
+        print(f"   {'aşama':<16}{'n':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        for stage, stats in data["stages"].items():
+            print(f"   {stage:<16}{stats['count']:>6}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    if "max_rss_mb" in results["meta"]:
+        print(f"\nmax RSS: {results['meta']['max_rss_mb']:.1f} MiB")
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Baseline'a göre gerilemeleri listeler (gecikme/bellek artışı veya site/dk düşüşü)."""
+    regressions = []
+    for size, base in baseline.get("sizes", {}).items():
+        current = results["sizes"].get(size)
+        if current is None:
+            continue
+        if current["sites_per_minute"] < base["sites_per_minute"] / (1 + tolerance):
+            regressions.append(f"{size} bölüm: site/dk {base['sites_per_minute']:.1f} -> {current['sites_per_minute']:.1f}")
+        if current["peak_memory_mb"] > base["peak_memory_mb"] * (1 + tolerance):
+            regressions.append(f"{size} bölüm: bellek {base['peak_memory_mb']:.1f} -> {current['peak_memory_mb']:.1f} MiB")
+        for stage, base_stats in base.get("stages", {}).items():
+            stats = current["stages"].get(stage)
+            if stats is None:
+                continue
+            for metric in ("p50_ms", "p90_ms"):
+                # Çok kısa aşamalardaki gürültü gerileme sayılmaz (min_delta_ms)
+                if (stats[metric] > base_stats[metric] * (1 + tolerance)
+                        and stats[metric] - base_stats[metric] > min_delta_ms):
+                    regressions.append(f"{size} bölüm / {stage} {metric}: "
+                                       f"{base_stats[metric]:.2f} -> {stats[metric]:.2f}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Site oluşturma hattı benchmark'ı (çevrimdışı).")
+    parser.add_argument("--sizes", default="2,8,32", type=lambda v: [int(x) for x in v.split(",")],
+                        help="Site başına bölüm sayıları (virgülle)")
+    parser.add_argument("--sites", type=int, default=5, help="Her boyutta oluşturulacak site sayısı")
+    parser.add_argument("--requests", type=int, default=20, help="Site başına sunum isteği")
+    parser.add_argument("--provider-latency", type=float, default=0.02, help="Sahte AI yanıt gecikmesi (sn)")
+    parser.add_argument("--scrape-latency", type=float, default=0.01, help="Sahte kaynak sunucu gecikmesi (sn)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Sonuçları baseline olarak kaydet")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline ile karşılaştır, gerilemede 1 ile çık")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="İzin verilen göreli kötüleşme")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Gerileme sayılacak en küçük fark")
+    parser.add_argument("--keep-output", action="store_true", help="Geçici çıktı klasörünü silme")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline_path = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Tüm çıktılar (siteler, kayıt, önbellekler) geçici bir klasöre yazılır
+    work_dir = tempfile.mkdtemp(prefix="site_bench_")
+    previous_cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        results = run(args)
+    finally:
+        os.chdir(previous_cwd)
+        if args.keep_output:
+            print(f"Output kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if baseline_path:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline saved to {baseline_path}")
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
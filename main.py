@@ -7,6 +7,8 @@ from agents.backend_agent import BackendAgent
 from agents.editor_agent import EditorAgent
 from agents.reviewer_agent import ReviewerAgent
 from agents.server_agent import ServerAgent # Bu genel ServerAgent tanımı olacak
+from agents.http_client import close_session
+from agents.ai_agents.client_registry import reset_clients
 
 
 from dotenv import load_dotenv
@@ -109,7 +111,6 @@ if __name__ == "__main__":
         ],
         "videos": [] # Henüz kullanılmıyor
     }
-    manager.create_website(site_topic_1, user_content_spec_1)
 
     # --- Web Sitesi 2 Oluşturma (Farklı portta) ---
     site_topic_2 = "Sustainable Energy Solutions"
@@ -123,7 +124,21 @@ if __name__ == "__main__":
             {"title": "Enerji Verimliliği İpuçları", "type": "text", "source": "local", "content": "Evde ve işyerinde enerji tasarrufu yaparak hem çevreyi koruyabilir hem de faturalarınızı azaltabilirsiniz. LED ampuller kullanın, cihazları fişten çekin, yalıtıma önem verin."}
         ]
     }
-    # manager.create_website(site_topic_2, user_content_spec_2) # İkinci siteyi de oluşturmak için yorumu kaldırın
+
+    # Build sürerken site canlı önizlemeden izlenebilir (bölümler ve AI metni üretildikçe akar)
+    preview = manager.execute({"action": "preview_site", "topic": site_topic_1, "user_content": user_content_spec_1})
+    logger.info(f"Live preview for '{site_topic_1}': {preview['url']}")
+
+    # Siteler build kuyruğunda eşzamanlı oluşturulur (SITE_BUILD_WORKERS ile sınırlı)
+    sites_to_build = [{"topic": site_topic_1, "user_content": user_content_spec_1}]
+    # sites_to_build.append({"topic": site_topic_2, "user_content": user_content_spec_2}) # İkinci siteyi de oluşturmak için yorumu kaldırın
+
+    # Önceki çalıştırmadan kayıtlı siteler yeniden oluşturulmadan sunulur; yalnızca yeni siteler build edilir
+    manager.restore_sites()
+    sites_to_build = [site for site in sites_to_build if site["topic"] not in manager.registered_sites]
+    build_result = manager.execute({"action": "create_sites", "sites": sites_to_build, "wait": True})
+    for job in build_result["jobs"]:
+        logger.info(f"Build job {job['job_id']} for '{job['topic']}': {job['status']}")
 
 
     # Zamanlayıcıyı başlat (periyodik içerik güncellemeleri için)
@@ -144,6 +159,8 @@ if __name__ == "__main__":
     finally:
         logger.info("Performing cleanup...")
         manager.stop_scheduler() # Önce zamanlayıcıyı durdur
+        if manager.build_queue:
+            manager.build_queue.shutdown(wait=False) # Bekleyen build işlerini iptal et
         
         # Tüm çalışan sunucuları durdur
         # registered_sites bir dictionary olduğu için .keys() kopyasını alarak iterate etmek daha güvenli olabilir
@@ -154,5 +171,9 @@ if __name__ == "__main__":
         for site_topic in active_sites:
             logger.info(f"Stopping server for site: {site_topic}")
             manager.stop_website(site_topic)
-        
+        manager.stop_server() # Tüm siteleri sunan paylaşılan sunucuyu kapat
+        manager.image_pipeline.shutdown() # Görsel varyant worker süreçlerini kapat
+
+        close_session() # Paylaşılan HTTP bağlantı havuzunu kapat
+        reset_clients() # AI sağlayıcı istemcilerini ve bağlantılarını bırak
         logger.info("Application shut down gracefully.")
\ No newline at end of file